@@ -0,0 +1,95 @@
+'''Холодные и постоянные соединения на ленте PostListView.
+
+Запросы идут через WSGIHandler, а не тестовый клиент: клиент отключает
+close_old_connections, и соединение никогда не закрывается. Тестовая
+база в памяти копируется в файл, иначе закрыть соединение нельзя.
+
+Запуск: pytest benchmarks/test_connections.py -s
+'''
+import gc
+import logging
+import os
+import sqlite3
+import time
+from statistics import median
+
+import pytest
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.client import RequestFactory
+from mixer.backend.django import mixer
+
+from blog.connections import stats
+
+REQUESTS = int(os.environ.get('BLOG_BENCH_REQUESTS', '200'))
+
+
+@pytest.fixture(autouse=True)
+def quiet_request_log():
+    logger = logging.getLogger('blog.requests')
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    yield
+    logger.setLevel(level)
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    '''Переключает соединение default на файловую копию тестовой базы.'''
+    connection.ensure_connection()
+    memory, settings_dict = connection.connection, connection.settings_dict
+    path = str(tmp_path / 'bench.sqlite3')
+    target = sqlite3.connect(path)
+    memory.backup(target)
+    target.close()
+    original = settings_dict['NAME'], settings_dict['CONN_MAX_AGE']
+    connection.connection = None
+    settings_dict['NAME'] = path
+    yield settings_dict
+    connection.close()
+    settings_dict['NAME'], settings_dict['CONN_MAX_AGE'] = original
+    connection.connection = memory
+
+
+def run(handler, environ):
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REQUESTS):
+            caches['feeds'].clear()
+            started = time.perf_counter()
+            response = handler(environ.copy(), lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        gc.enable()
+    return timings
+
+
+def opened():
+    return stats.as_dict()['databases'].get('default', {}).get('opened', 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_persistent_connections_are_faster(file_database):
+    mixer.cycle(30).blend('blog.Post', is_published=True, image='')
+    handler = WSGIHandler()
+    environ = RequestFactory()._base_environ(PATH_INFO='/')
+    results = {}
+    for name, max_age in (('cold', 0), ('persistent', 600)):
+        file_database['CONN_MAX_AGE'] = max_age
+        connection.close()
+        before = opened()
+        timings = run(handler, environ)
+        results[name] = (median(timings), opened() - before)
+    print(f'\n{"соединения":<12}{"p50, мс":>10}{"открыто":>10}')
+    for name, (p50, count) in results.items():
+        print(f'{name:<12}{p50:>10.2f}{count:>10}')
+    assert results['cold'][1] == REQUESTS
+    assert results['persistent'][1] == 1, (
+        'Постоянное соединение должно открываться один раз.'
+    )
+    assert results['persistent'][0] < results['cold'][0]
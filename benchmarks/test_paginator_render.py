@@ -0,0 +1,53 @@
+'''Рендеринг пагинатора при росте числа страниц.
+
+Запуск: pytest benchmarks/test_paginator_render.py -s
+'''
+import time
+from statistics import median
+
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+
+REPEATS = 200
+PAGE_COUNTS = (10, 1_000, 100_000, 5_000_000)
+
+
+def render(num_pages, with_elided_range):
+    page = Paginator(range(num_pages * 10), 10).page(num_pages // 2 or 1)
+    context = {'page_obj': page}
+    if with_elided_range:
+        context['page_range'] = page.paginator.get_elided_page_range(
+            page.number, on_each_side=2, on_ends=1
+        )
+    return render_to_string('includes/paginator.html', context)
+
+
+def measure(num_pages, with_elided_range=True, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        html = render(num_pages, with_elided_range)
+        timings.append(time.perf_counter() - start)
+    return len(html), median(timings)
+
+
+def test_elided_paginator_render_is_constant():
+    results = {pages: measure(pages) for pages in PAGE_COUNTS}
+    print('\nстраниц      байт HTML   медиана, мс')
+    for pages, (size, seconds) in results.items():
+        print(f'{pages:>9} {size:>12} {seconds * 1000:>12.3f}')
+    sizes = [size for size, _ in results.values()]
+    timings = [seconds for _, seconds in results.values()]
+    assert max(sizes) - min(sizes) < 100, sizes
+    assert max(timings) < min(timings) * 3, timings
+
+
+def test_full_page_range_for_comparison():
+    size, seconds = measure(1_000, with_elided_range=False, repeats=5)
+    elided_size, elided_seconds = measure(1_000)
+    print(
+        f'\n1000 страниц: полный диапазон {size} байт, '
+        f'{seconds * 1000:.3f} мс; сокращённый {elided_size} байт, '
+        f'{elided_seconds * 1000:.3f} мс'
+    )
+    assert elided_size * 20 < size
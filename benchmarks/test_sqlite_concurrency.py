@@ -0,0 +1,172 @@
+'''Параллельные читатели ленты и писатели комментариев на SQLite.
+
+Сравниваются два профиля на одном файле базы: стандартный (журнал
+отката, транзакции BEGIN) и профиль blog.backends.sqlite3 (WAL,
+PRAGMAS, BEGIN IMMEDIATE для записи). Писатель, как AddCommentView,
+читает пост, вставляет комментарий и обновляет счётчик в одной
+транзакции.
+
+Запуск: pytest benchmarks/test_sqlite_concurrency.py -s
+'''
+import os
+import sqlite3
+import threading
+import time
+
+from blog.backends.sqlite3.base import (
+    PRAGMAS, apply_pragmas, begin_statement,
+)
+
+READERS = int(os.environ.get('BLOG_BENCH_READERS', '8'))
+WRITERS = int(os.environ.get('BLOG_BENCH_WRITERS', '4'))
+DURATION = float(os.environ.get('BLOG_BENCH_DURATION', '3'))
+POSTS = 2000
+# Таймаут sqlite3.connect по умолчанию, как у Django без OPTIONS.
+DEFAULT_TIMEOUT = 5.0
+
+PROFILES = {
+    'default': {'pragmas': {}, 'immediate': False},
+    'tuned': {'pragmas': PRAGMAS, 'immediate': True},
+}
+
+SCHEMA = '''
+CREATE TABLE blog_post (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    pub_date TEXT NOT NULL,
+    is_published INTEGER NOT NULL,
+    comment_count INTEGER NOT NULL
+);
+CREATE INDEX blog_post_feed ON blog_post (is_published, pub_date);
+CREATE TABLE blog_comment (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL REFERENCES blog_post (id),
+    text TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX blog_comment_post ON blog_comment (post_id, created_at);
+'''
+FEED = '''
+SELECT id, title, pub_date, comment_count FROM blog_post
+WHERE is_published AND pub_date <= ?
+ORDER BY pub_date DESC LIMIT 10 OFFSET ?
+'''
+
+
+def connect(path, profile):
+    connection = sqlite3.connect(
+        path, timeout=DEFAULT_TIMEOUT, isolation_level=None,
+        check_same_thread=False,
+    )
+    apply_pragmas(connection, profile['pragmas'])
+    return connection
+
+
+def create(path):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.executescript(SCHEMA)
+    connection.executemany(
+        'INSERT INTO blog_post VALUES (?, ?, ?, 1, 0)',
+        (
+            (i, f'Пост {i}', f'2024-01-01 00:00:{i % 60:02}')
+            for i in range(1, POSTS + 1)
+        ),
+    )
+    connection.close()
+
+
+def reader(connection, profile, stop, counts):
+    '''Страница ленты и число постов в одной читающей транзакции.'''
+    page = 0
+    while not stop.is_set():
+        try:
+            connection.execute(begin_statement(False))
+            connection.execute(
+                'SELECT count(*) FROM blog_post WHERE is_published'
+            ).fetchone()
+            connection.execute(FEED, ('2025', page % 50 * 10)).fetchall()
+            connection.execute('COMMIT')
+            counts['reads'] += 1
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            counts['errors'] += 1
+        page += 1
+
+
+def writer(connection, profile, stop, counts):
+    post = 0
+    while not stop.is_set():
+        post = post % POSTS + 1
+        try:
+            connection.execute(begin_statement(profile['immediate']))
+            connection.execute(
+                'SELECT id FROM blog_post WHERE id = ?', (post,)
+            ).fetchone()
+            connection.execute(
+                'INSERT INTO blog_comment (post_id, text, created_at) '
+                "VALUES (?, 'Комментарий', datetime('now'))", (post,)
+            )
+            connection.execute(
+                'UPDATE blog_post SET comment_count = comment_count + 1 '
+                'WHERE id = ?', (post,)
+            )
+            connection.execute('COMMIT')
+            counts['writes'] += 1
+        except sqlite3.OperationalError:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            counts['errors'] += 1
+
+
+def run(path, profile):
+    create(path)
+    stop = threading.Event()
+    workers = [
+        (reader, {'reads': 0, 'errors': 0}) for _ in range(READERS)
+    ] + [
+        (writer, {'writes': 0, 'errors': 0}) for _ in range(WRITERS)
+    ]
+    connections = [connect(path, profile) for _ in workers]
+    threads = [
+        threading.Thread(
+            target=function, args=(connection, profile, stop, counts)
+        )
+        for (function, counts), connection in zip(workers, connections)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    for connection in connections:
+        connection.close()
+    return {
+        key: sum(counts.get(key, 0) for _, counts in workers) / DURATION
+        for key in ('reads', 'writes', 'errors')
+    }
+
+
+def test_tuned_profile_outperforms_default(tmp_path):
+    results = {
+        name: run(str(tmp_path / f'{name}.sqlite3'), profile)
+        for name, profile in PROFILES.items()
+    }
+    print(
+        f'\n{READERS} читателей, {WRITERS} писателей, {DURATION:g} с'
+        f'\n{"профиль":<10}{"чтений/с":>12}{"записей/с":>12}{"ошибок/с":>12}'
+    )
+    for name, result in results.items():
+        print(
+            f'{name:<10}{result["reads"]:>12.0f}{result["writes"]:>12.0f}'
+            f'{result["errors"]:>12.1f}'
+        )
+    default, tuned = results['default'], results['tuned']
+    assert tuned['errors'] == 0, (
+        'Профиль с WAL и BEGIN IMMEDIATE не должен ловить '
+        '«database is locked».'
+    )
+    assert tuned['reads'] + tuned['writes'] > (
+        default['reads'] + default['writes']
+    ), 'Профиль с WAL должен обрабатывать больше операций.'
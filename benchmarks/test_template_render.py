@@ -0,0 +1,89 @@
+'''Рендеринг blog/post_list.html с 10 карточками: кэш шаблонов и без.
+
+Без cached.Loader каждый {% include %} карточки заново находит и
+разбирает файл шаблона. Кэш фрагментов сбрасывается перед каждым
+рендерингом, кроме последнего прогона, где карточки берутся из него.
+
+Запуск: pytest benchmarks/test_template_render.py -s
+'''
+import time
+from copy import deepcopy
+from datetime import datetime, timezone
+from statistics import median
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test.client import RequestFactory
+
+from blog.models import Category, Post, User
+from blog.template_cache import compile_templates
+
+REPEATS = 200
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def backend(cached):
+    params = deepcopy(settings.TEMPLATES[0])
+    params.pop('BACKEND')
+    options = params.pop('OPTIONS')
+    options['loaders'] = (
+        [('django.template.loaders.cached.Loader', LOADERS)]
+        if cached else LOADERS
+    )
+    return DjangoTemplates({
+        **params, 'NAME': 'bench', 'APP_DIRS': False, 'OPTIONS': options,
+    })
+
+
+def context():
+    author = User(username='author')
+    category = Category(slug='category', title='Категория', is_published=True)
+    posts = [
+        Post(
+            id=number, title=f'Пост {number}', text='Текст поста. ' * 50,
+            pub_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            author=author, category=category, is_published=True,
+            comment_count=number,
+        )
+        for number in range(1, 11)
+    ]
+    return {'page_obj': Paginator(posts, 10).page(1)}
+
+
+def measure(engine, cached_cards=False):
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    data = context()
+    timings = []
+    for _ in range(REPEATS):
+        if not cached_cards:
+            caches['fragments'].clear()
+        started = time.perf_counter()
+        engine.get_template('blog/post_list.html').render(data, request)
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def test_cached_loader_renders_faster():
+    plain, cached = backend(cached=False), backend(cached=True)
+    started = time.perf_counter()
+    count, errors = compile_templates(cached.engine)
+    warm_up = (time.perf_counter() - started) * 1000
+    assert not errors, errors
+    results = {
+        'без кэша': measure(plain),
+        'cached.Loader': measure(cached),
+        '+ карточки': measure(cached, cached_cards=True),
+    }
+    print(f'\nпрогрев: {count} шаблонов за {warm_up:.0f} мс')
+    print(f'{"загрузчик":<16}{"медиана, мс":>12}')
+    for name, result in results.items():
+        print(f'{name:<16}{result:>12.2f}')
+    assert results['cached.Loader'] < results['без кэша']
+    assert results['+ карточки'] < results['cached.Loader']
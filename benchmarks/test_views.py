@@ -0,0 +1,254 @@
+'''Задержка и число SQL-запросов всех страниц блога.
+
+Данные создаются через mixer и bulk_create. Полный объём — 10 000
+пользователей, 100 000 постов и 1 000 000 комментариев — задаётся
+BLOG_BENCH_SCALE=1, по умолчанию берётся сотая часть.
+
+Запуск: pytest benchmarks/test_views.py -s
+Перезаписать базовые значения: BLOG_BENCH_UPDATE=1 pytest ...
+
+Результаты сравниваются с benchmarks/baselines.json для того же
+масштаба: тест падает, если страница делает больше запросов, чем
+в базовом прогоне, или её p95 вырос больше допуска.
+'''
+import gc
+import json
+import logging
+import os
+import random
+import time
+from datetime import timedelta
+from pathlib import Path
+from statistics import median, quantiles
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from blog.models import Category, Comment, Location, Post, User
+
+SCALE = float(os.environ.get('BLOG_BENCH_SCALE', '0.01'))
+REPEATS = int(os.environ.get('BLOG_BENCH_REPEATS', '20'))
+UPDATE = os.environ.get('BLOG_BENCH_UPDATE') == '1'
+# Допуск роста p95: в разах от базового и абсолютный, в мс.
+LATENCY_TOLERANCE = float(os.environ.get('BLOG_BENCH_TOLERANCE', '1.0'))
+LATENCY_SLACK_MS = 20.0
+BASELINES = Path(__file__).with_name('baselines.json')
+
+USERS = max(int(10_000 * SCALE), 10)
+POSTS = max(int(100_000 * SCALE), 50)
+COMMENTS = max(int(1_000_000 * SCALE), 200)
+CATEGORIES = 20
+LOCATIONS = 50
+BATCH = 2000
+
+
+def blend(model, count, **values):
+    with mixer.ctx(commit=False):
+        objects = mixer.cycle(count).blend(model, **values)
+    return objects[0]._meta.model.objects.bulk_create(
+        objects, batch_size=BATCH
+    )
+
+
+def seed():
+    random.seed(1)
+    now = timezone.now()
+    blend('auth.User', USERS, username=(f'user{i}' for i in range(USERS)))
+    users = list(User.objects.order_by('pk'))
+    blend(
+        'blog.Category', CATEGORIES,
+        slug=(f'category-{i}' for i in range(CATEGORIES)),
+        is_published=(i % 10 != 0 for i in range(CATEGORIES)),
+    )
+    categories = list(Category.objects.order_by('pk'))
+    blend('blog.Location', LOCATIONS)
+    locations = list(Location.objects.order_by('pk'))
+    for start in range(0, POSTS, BATCH):
+        size = min(BATCH, POSTS - start)
+        blend(
+            'blog.Post', size,
+            author=(random.choice(users) for _ in range(size)),
+            category=(random.choice(categories) for _ in range(size)),
+            location=(random.choice(locations) for _ in range(size)),
+            # Пять процентов постов отложены, пять — скрыты.
+            pub_date=(
+                now + timedelta(days=random.uniform(-1000, 50))
+                for _ in range(size)
+            ),
+            is_published=(random.random() > 0.05 for _ in range(size)),
+            image='',
+        )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    # Длинный хвост: несколько постов собирают большую часть комментариев.
+    weights = [random.paretovariate(1.2) for _ in post_ids]
+    for start in range(0, COMMENTS, BATCH):
+        size = min(BATCH, COMMENTS - start)
+        blend(
+            'blog.Comment', size,
+            post=(
+                Post(pk=pk) for pk in random.choices(post_ids, weights, k=size)
+            ),
+            author=(random.choice(users) for _ in range(size)),
+        )
+    Post.objects.recount_comments()
+
+
+@pytest.fixture(autouse=True)
+def quiet_request_log():
+    logger = logging.getLogger('blog.requests')
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    yield
+    logger.setLevel(level)
+
+
+@pytest.fixture(scope='module')
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        started = time.perf_counter()
+        seed()
+        print(
+            f'\nДанные: {USERS} пользователей, {POSTS} постов, '
+            f'{COMMENTS} комментариев за {time.perf_counter() - started:.0f} с'
+        )
+        post = Post.objects.published().order_by('-comment_count').first()
+        comment = Comment.objects.create(
+            post=post, author=post.author, text='Комментарий автора'
+        )
+        yield {
+            'post': post,
+            'comment': comment,
+            'author': post.author,
+            'category': post.category,
+        }
+        for model in (Comment, Post, Location, Category, User):
+            model.objects.all().delete()
+
+
+def url_params(data):
+    '''Параметры каждого именованного URL блога и статических страниц.'''
+    post, comment = data['post'], data['comment']
+    return {
+        'blog:index': ({}, ''),
+        'blog:post_detail': ({'post_id': post.pk}, ''),
+        'blog:post_comments': ({'post_id': post.pk}, ''),
+        'blog:create_post': ({}, ''),
+        'blog:edit_post': ({'post_id': post.pk}, ''),
+        'blog:delete_post': ({'post_id': post.pk}, ''),
+        'blog:add_comment': ({'post_id': post.pk}, ''),
+        'blog:edit_comment': (
+            {'post_id': post.pk, 'comment_id': comment.pk}, ''
+        ),
+        'blog:delete_comment': (
+            {'post_id': post.pk, 'comment_id': comment.pk}, ''
+        ),
+        'blog:profile': ({'username': data['author'].username}, ''),
+        'blog:category_posts': (
+            {'category_slug': data['category'].slug}, ''
+        ),
+        'blog:edit_profile': ({}, ''),
+        'blog:search': ({}, '?q=и'),
+        'blog:export': ({'kind': 'posts'}, ''),
+        'pages:rules': ({}, ''),
+        'pages:about': ({}, ''),
+    }
+
+
+def app_url_names():
+    resolver = get_resolver()
+    names = set()
+    for namespace in ('blog', 'pages'):
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        names |= {
+            f'{namespace}:{name}'
+            for name in sub_resolver.reverse_dict
+            if isinstance(name, str)
+        }
+    return names
+
+
+def measure(client, url):
+    '''Холодные запросы: кэш лент сбрасывается перед каждым.'''
+    client.get(url)
+    timings, query_counts = [], []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            caches['feeds'].clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+    finally:
+        gc.enable()
+    cuts = quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+    return {
+        'status': response.status_code,
+        'queries': max(query_counts),
+        'p50_ms': round(median(timings), 2),
+        'p95_ms': round(cuts[18], 2),
+    }
+
+
+def regressions(results, baseline):
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            yield f'{key}: запросов {old["queries"]} → {result["queries"]}'
+        limit = old['p95_ms'] * (1 + LATENCY_TOLERANCE) + LATENCY_SLACK_MS
+        if result['p95_ms'] > limit:
+            yield f'{key}: p95 {old["p95_ms"]} → {result["p95_ms"]} мс'
+
+
+@pytest.mark.django_db
+def test_every_url_is_benchmarked(dataset):
+    assert app_url_names() <= set(url_params(dataset)), (
+        'Добавьте новые URL в url_params бенчмарка.'
+    )
+
+
+@pytest.mark.django_db
+def test_views_do_not_regress(dataset, client):
+    urls = {
+        name: reverse(name, kwargs=kwargs) + query
+        for name, (kwargs, query) in url_params(dataset).items()
+    }
+    author = dataset['author']
+    author.is_staff = True
+    author.save(update_fields=['is_staff'])
+    results = {}
+    for viewer in ('anonymous', 'author'):
+        if viewer == 'author':
+            client.force_login(author)
+        for name, url in urls.items():
+            results[f'{viewer} {name}'] = measure(client, url)
+    print(f'\n{"страница":<34}{"код":>5}{"SQL":>6}{"p50":>9}{"p95":>9}')
+    for key, result in results.items():
+        print(
+            f'{key:<34}{result["status"]:>5}{result["queries"]:>6}'
+            f'{result["p50_ms"]:>9.1f}{result["p95_ms"]:>9.1f}'
+        )
+    scale_key = f'scale={SCALE:g}'
+    baselines = {}
+    if BASELINES.exists():
+        baselines = json.loads(BASELINES.read_text(encoding='utf-8'))
+    if UPDATE or scale_key not in baselines:
+        baselines[scale_key] = results
+        BASELINES.write_text(
+            json.dumps(baselines, ensure_ascii=False, indent=2) + '\n',
+            encoding='utf-8',
+        )
+        return
+    failures = list(regressions(results, baselines[scale_key]))
+    assert not failures, '\n'.join(failures)
@@ -1,10 +1,72 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
 
-from .models import Category, Comment, Location, Post
+from .models import Category, Comment, ImageJob, Location, Post
+from .search import fts_available, fts_match, fts_query
+from .signals import bulk_updated
+
+
+def update_in_bulk(queryset, **values):
+    '''Меняет записи одним UPDATE и один раз сбрасывает кэши.
+
+    UPDATE минует auto_now, поэтому updated_at ставится явно.
+    '''
+    if any(
+        field.name == 'updated_at' for field in queryset.model._meta.fields
+    ):
+        values['updated_at'] = timezone.now()
+    with transaction.atomic():
+        updated = queryset.update(**values)
+        transaction.on_commit(
+            lambda: bulk_updated.send(sender=queryset.model, count=updated)
+        )
+    return updated
+
+
+@admin.action(description='Опубликовать выбранные')
+def publish(modeladmin, request, queryset):
+    updated = update_in_bulk(queryset, is_published=True)
+    modeladmin.message_user(request, f'Опубликовано: {updated}')
+
+
+@admin.action(description='Снять с публикации выбранные')
+def unpublish(modeladmin, request, queryset):
+    updated = update_in_bulk(queryset, is_published=False)
+    modeladmin.message_user(request, f'Снято с публикации: {updated}')
+
+
+@admin.action(description='Перенести выбранные в категорию')
+def move_to_category(modeladmin, request, queryset):
+    try:
+        category = PostActionForm.base_fields['category'].clean(
+            request.POST.get('category')
+        )
+    except ValidationError:
+        category = None
+    if category is None:
+        modeladmin.message_user(
+            request, 'Выберите категорию для переноса.', messages.ERROR
+        )
+        return
+    updated = update_in_bulk(queryset, category=category)
+    modeladmin.message_user(
+        request, f'Перенесено в «{category}»: {updated}'
+    )
+
+
+class PostActionForm(ActionForm):
+    category = forms.ModelChoiceField(
+        Category.objects.all(), required=False, label='Категория'
+    )
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
+    actions = (publish, unpublish)
     list_display = (
         'title',
         'is_published',
@@ -17,16 +79,20 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
+    actions = (publish, unpublish)
     list_display = (
         'name',
         'is_published',
         'created_at',
     )
     list_editable = ('is_published',)
+    search_fields = ('name',)
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
+    actions = (publish, unpublish, move_to_category)
+    action_form = PostActionForm
     list_display = (
         'title',
         'is_published',
@@ -34,18 +100,44 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'location',
         'category',
-        'image',
+        'image_tag',
     )
     list_editable = ('is_published',)
+    list_select_related = ('author', 'location', 'category')
+    list_per_page = 50
     search_fields = ('title',)
+    autocomplete_fields = ('author', 'location', 'category')
     readonly_fields = ['image_tag']
 
+    def get_search_results(self, request, queryset, search_term):
+        if not fts_query(search_term) or not fts_available(queryset.db):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(pk__in=fts_match(search_term)), False
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
+    actions = (publish, unpublish)
     list_display = (
         'text',
         'is_published',
         'author'
     )
     list_editable = ('is_published',)
+    list_select_related = ('author',)
+    list_per_page = 50
+    autocomplete_fields = ('author', 'post')
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image',
+        'status',
+        'attempts',
+        'updated_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('post', 'image', 'attempts', 'error')
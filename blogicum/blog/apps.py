@@ -1,7 +1,28 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def restore_search_index(sender, using, **kwargs):
+    '''Возвращает триггеры индекса поиска после пересоздания blog_post.'''
+    from .search import FTS_TABLE, install_fts
+    connection = connections[using]
+    if FTS_TABLE in connection.introspection.table_names():
+        install_fts(connection)
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .connections import check_connections, connection_opened
+        post_migrate.connect(restore_search_index, sender=self)
+        # Срабатывает после close_old_connections, который уже закрыл
+        # соединения старше CONN_MAX_AGE.
+        request_started.connect(check_connections)
+        connection_created.connect(connection_opened)
@@ -0,0 +1,69 @@
+'''SQLite с профилем PRAGMA для продакшена.
+
+Каждое новое соединение получает PRAGMAS, поверх которых ложатся
+OPTIONS['pragmas'] из настроек базы; значение None отключает PRAGMA.
+Транзакции на запись начинаются с BEGIN IMMEDIATE: блокировка берётся
+сразу, и конкурент ждёт busy_timeout, а не получает «database is locked»
+при попытке поднять блокировку посреди транзакции. Транзакции
+безопасных HTTP-запросов — обычный BEGIN, см. deferred_transactions.
+'''
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.sqlite3 import base
+
+# busy_timeout идёт первым: переключение в WAL тоже ждёт блокировку.
+PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+_writes = ContextVar('blog_sqlite_writes', default=True)
+
+
+def pragmas(options):
+    '''Профиль PRAGMA соединения с учётом OPTIONS['pragmas'].'''
+    profile = {**PRAGMAS, **options.get('pragmas', {})}
+    return {
+        name: value for name, value in profile.items() if value is not None
+    }
+
+
+def apply_pragmas(connection, profile):
+    for name, value in profile.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def begin_statement(writes):
+    return 'BEGIN IMMEDIATE' if writes else 'BEGIN'
+
+
+@contextmanager
+def deferred_transactions():
+    '''Транзакции внутри блока только читают и начинаются с BEGIN.'''
+    token = _writes.set(False)
+    try:
+        yield
+    finally:
+        _writes.reset(token)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, pragmas(self.settings_dict['OPTIONS']))
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(begin_statement(_writes.get()))
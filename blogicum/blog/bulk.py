@@ -0,0 +1,246 @@
+'''Массовая загрузка записей в обход save() и сигналов по строкам.'''
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from .inverted_index import search_index
+from .models import Comment, Post
+from .signals import bulk_updated
+
+CHUNK_SIZE = 1 << 16
+# Сколько символов можно дочитывать в поисках конца одного объекта.
+MAX_OBJECT_SIZE = 1 << 24
+WHITESPACE = ' \t\r\n'
+
+
+class JsonObjectStream:
+    '''Объекты из JSON-массива или JSONL по мере чтения потока.
+
+    Формат определяется по первому символу: «[» — массив фикстуры
+    dumpdata, иначе — по объекту на строку. В памяти держится только
+    непрочитанный хвост буфера; если в max_object_size символах нет
+    целого объекта, поток считается битым и дальше не читается.
+    '''
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE,
+                 max_object_size=MAX_OBJECT_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_object_size = max_object_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def peek(self, skip=WHITESPACE):
+        '''Следующий значимый символ или пустая строка в конце потока.'''
+        while True:
+            while (
+                self.position < len(self.buffer)
+                and self.buffer[self.position] in skip
+            ):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return ''
+            self.fill()
+
+    def decode(self):
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                if self.eof:
+                    raise
+                if len(self.buffer) - self.position > self.max_object_size:
+                    raise ValueError(
+                        f'Нет целого JSON-объекта в {self.max_object_size} '
+                        f'символах: {error}'
+                    ) from error
+                self.fill()
+                continue
+            if end == len(self.buffer) and not self.eof:
+                # Число в конце буфера может продолжаться в следующем куске.
+                self.fill()
+                continue
+            self.position = end
+            return obj
+
+    def __iter__(self):
+        if self.peek() != '[':
+            while self.peek():
+                yield self.decode()
+            return
+        self.position += 1
+        while (character := self.peek(WHITESPACE + ',')) != ']':
+            if not character:
+                raise ValueError('Неожиданный конец JSON-массива.')
+            yield self.decode()
+        self.position += 1
+        if self.peek():
+            raise ValueError('Данные после конца JSON-массива.')
+
+
+def iter_json_objects(stream, chunk_size=CHUNK_SIZE,
+                      max_object_size=MAX_OBJECT_SIZE):
+    return iter(JsonObjectStream(stream, chunk_size, max_object_size))
+
+
+def fill_timestamps(obj):
+    '''Заполняет пустые поля auto_now и auto_now_add объекта.'''
+    for field in obj._meta.concrete_fields:
+        automatic = (
+            getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+        )
+        if automatic and getattr(obj, field.attname) is None:
+            field.pre_save(obj, add=True)
+
+
+class BulkLoader:
+    '''Копит десериализованные объекты по моделям и вставляет пачками.
+
+    Вставка идёт как у loaddata (raw): auto_now и auto_now_add не
+    перезаписывают значения из фикстуры, сигналы не отправляются.
+    Отметки, которых в фикстуре нет, получают текущее время.
+    '''
+
+    def __init__(self, using, batch_size, ignore_conflicts=False):
+        self.using = using
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.pending = defaultdict(list)
+        self.counts = defaultdict(int)
+        self.deferred = []
+
+    def add(self, deserialized):
+        model = deserialized.object._meta.model
+        if model._meta.parents:
+            raise ValueError(
+                f'{model._meta.label}: наследование таблиц не поддерживается.'
+            )
+        if deserialized.m2m_data and deserialized.object.pk is None:
+            raise ValueError(
+                f'{model._meta.label}: для связей many-to-many нужен pk.'
+            )
+        if deserialized.deferred_fields:
+            self.deferred.append(deserialized)
+        fill_timestamps(deserialized.object)
+        self.pending[model].append(deserialized)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        batch, self.pending[model] = self.pending[model], []
+        if not batch:
+            return
+        opts = model._meta
+        with_pk = [item.object for item in batch if item.object.pk is not None]
+        without_pk = [item.object for item in batch if item.object.pk is None]
+        fields = opts.local_concrete_fields
+        self._insert(model, with_pk, fields)
+        self._insert(
+            model, without_pk, [field for field in fields if field != opts.pk]
+        )
+        for item in batch:
+            for name, values in item.m2m_data.items():
+                self._insert_m2m(opts.get_field(name), item.object.pk, values)
+        self.counts[model] += len(batch)
+
+    def flush_all(self):
+        for model in list(self.pending):
+            self.flush(model)
+        for item in self.deferred:
+            item.save_deferred_fields(using=self.using)
+
+    def _insert(self, model, objs, fields):
+        if not objs:
+            return
+        connection = connections[self.using]
+        size = max(1, min(
+            self.batch_size, connection.ops.bulk_batch_size(fields, objs)
+        ))
+        manager = model._base_manager.using(self.using)
+        for start in range(0, len(objs), size):
+            manager._insert(
+                objs[start:start + size],
+                fields=fields,
+                using=self.using,
+                raw=True,
+                ignore_conflicts=self.ignore_conflicts,
+            )
+
+    def _insert_m2m(self, field, pk, values):
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        through._base_manager.using(self.using).filter(**{source: pk}).delete()
+        through._base_manager.using(self.using).bulk_create(
+            [through(**{source: pk, target: value}) for value in values],
+            batch_size=self.batch_size,
+            ignore_conflicts=self.ignore_conflicts,
+        )
+
+
+class RateReport:
+    '''Число строк и скорость загрузки по моделям.'''
+
+    def __init__(self):
+        self.started = time.monotonic()
+
+    def lines(self, counts):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        total = sum(counts.values())
+        for model, count in sorted(
+            counts.items(), key=lambda item: item[0]._meta.label
+        ):
+            yield f'{model._meta.label}: {count}'
+        yield (
+            f'Всего строк: {total} за {elapsed:.1f} с '
+            f'({total / elapsed:.0f} строк/с)'
+        )
+
+
+def finish_bulk_load(models, using='default'):
+    '''Приводит производные данные в порядок после массовой вставки.
+
+    Сдвигает последовательности pk, пересчитывает счётчики
+    комментариев, перестраивает индекс поиска и после коммита
+    сбрасывает кэши лент.
+    '''
+    models = set(models)
+    if not models:
+        return
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    if models & {Post, Comment}:
+        Post.objects.using(using).recount_comments()
+        transaction.on_commit(reindex_search, using=using)
+    for model in models:
+        transaction.on_commit(
+            lambda model=model: bulk_updated.send(sender=model, count=None),
+            using=using,
+        )
+
+
+def reindex_search():
+    '''Перестраивает индекс поиска, если им пользуются через снимок.'''
+    if search_index.path.exists():
+        search_index.rebuild()
+        search_index.save()
+    else:
+        search_index.reset()
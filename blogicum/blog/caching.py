@@ -0,0 +1,200 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from . import metrics, routers
+from .thumbnails import thumbnail_url
+
+VERSION_KEY = 'blog:feed:version'
+INVALIDATED_KEY = 'blog:feed:invalidated'
+COUNT_GENERATION_KEY = 'blog:count:generation'
+
+
+class CacheStats:
+    '''Счётчики попаданий и промахов кэша в текущем процессе.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+        metrics.record_cache(hit=True)
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+        metrics.record_cache(hit=False)
+
+    def as_dict(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+count_stats = CacheStats()
+
+
+def get_cache():
+    return caches[settings.BLOG_FEED_CACHE_ALIAS]
+
+
+def _generation(key):
+    '''Текущее поколение группы ключей.
+
+    Если ключ вытеснен, поколение начинается с текущего времени,
+    чтобы не совпасть ни с одним из ранее выданных.
+    '''
+    cache = get_cache()
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _next_generation(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def feed_version():
+    '''Текущее поколение кэша лент.'''
+    return _generation(VERSION_KEY)
+
+
+def _mark_invalidated():
+    '''Запоминает момент сброса: реплики могут его ещё не догнать.'''
+    get_cache().set(
+        INVALIDATED_KEY, time.time(), settings.BLOG_REPLICA_PIN_SECONDS
+    )
+
+
+def read_for_cache():
+    '''Выбирает базу для чтения, результат которого ляжет в общий кэш.
+
+    Промахи кэша читают с реплики, если она разрешена запросу. Но
+    BLOG_REPLICA_PIN_SECONDS секунд после сброса лент или чисел постов
+    реплика может не видеть записи, из-за которой был сброс, и
+    закрепила бы старые данные под новым поколением. В это время
+    чтение идёт с основной базы.
+    '''
+    invalidated = get_cache().get(INVALIDATED_KEY)
+    if (
+        invalidated is not None
+        and time.time() - invalidated < settings.BLOG_REPLICA_PIN_SECONDS
+    ):
+        routers.use_primary()
+
+
+def invalidate_feeds():
+    '''Делает недействительными все закэшированные страницы лент.'''
+    _next_generation(VERSION_KEY)
+    _mark_invalidated()
+
+
+def count_key(scope):
+    return f'blog:count:{_generation(COUNT_GENERATION_KEY)}:{scope}'
+
+
+def get_count(scope, compute, timeout):
+    '''Число постов ленты из кэша или точный подсчёт при промахе.'''
+    cache = get_cache()
+    key = count_key(scope)
+    count = cache.get(key)
+    if count is None:
+        count_stats.miss()
+        read_for_cache()
+        count = compute()
+        if timeout:
+            cache.set(key, count, timeout)
+    else:
+        count_stats.hit()
+    return count
+
+
+def adjust_count(scope, delta):
+    '''Сдвигает закэшированное число постов ленты, если оно есть.'''
+    try:
+        get_cache().incr(count_key(scope), delta)
+    except ValueError:
+        pass
+
+
+def invalidate_counts():
+    '''Сбрасывает все закэшированные числа постов лент.'''
+    _next_generation(COUNT_GENERATION_KEY)
+    _mark_invalidated()
+
+
+def page_key(scope, request):
+    viewer = request.user.pk if request.user.is_authenticated else 'anon'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:feed:{feed_version()}:{scope}:{viewer}:{path}'
+
+
+def get_page(key):
+    cached = get_cache().get(key)
+    if cached is None:
+        stats.miss()
+        return None
+    stats.hit()
+    content, content_type = cached
+    return HttpResponse(content, content_type=content_type)
+
+
+def set_page(key, response, timeout=None):
+    if timeout is None:
+        timeout = settings.BLOG_FEED_CACHE_TIMEOUT
+    if response.status_code != 200 or not timeout:
+        return
+    get_cache().set(
+        key, (response.content, response.get('Content-Type')), timeout
+    )
+
+
+def card_key(post):
+    '''Ключ карточки поста: id и хеш всего, что в ней выводится.
+
+    Смена заголовка, числа комментариев, публикации категории или места,
+    имени автора или готовность миниатюры дают новый ключ, поэтому
+    карточки не нужно сбрасывать явно.
+    '''
+    category, location = post.category, post.location
+    stamp = (
+        post.title, post.text, post.pub_date.isoformat(), post.is_published,
+        thumbnail_url(post.image, 'card'), post.comment_count,
+        post.author.username,
+        category and (category.slug, category.title, category.is_published),
+        location and (location.name, location.is_published),
+    )
+    digest = hashlib.md5(repr(stamp).encode()).hexdigest()
+    return f'blog:card:{post.pk}:{digest}'
+
+
+def get_fragment(name, key, render):
+    '''HTML фрагмента из кэша, а при промахе — результат render().'''
+    started = time.perf_counter()
+    cache = caches[settings.BLOG_FRAGMENT_CACHE_ALIAS]
+    html = cache.get(key)
+    hit = html is not None
+    if not hit:
+        html = render()
+        cache.set(key, html, settings.BLOG_FRAGMENT_CACHE_TIMEOUT)
+    metrics.record_fragment(
+        name, hit, (time.perf_counter() - started) * 1000
+    )
+    return html
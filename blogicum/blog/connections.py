@@ -0,0 +1,63 @@
+'''Постоянные соединения с базой: проверка перед запросом и статистика.
+
+Django держит соединение CONN_MAX_AGE секунд, но не проверяет его перед
+запросом: соединение, закрытое PgBouncer или сервером, всплывёт ошибкой
+в первом же SQL. check_connections по сигналу request_started пингует
+открытые соединения и закрывает неживые. Счётчики ведутся на процесс,
+у каждого воркера свои.
+'''
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+
+class ConnectionStats:
+    '''Счётчики соединений воркера по алиасам баз.'''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.databases = {}
+
+    def add(self, alias, event):
+        if self.pid != os.getpid():
+            # Воркер унаследовал счётчики мастера при fork.
+            self.reset()
+        self.databases.setdefault(alias, Counter())[event] += 1
+
+    def as_dict(self):
+        return {
+            'pid': self.pid,
+            'databases': {
+                alias: dict(counter)
+                for alias, counter in self.databases.items()
+            },
+        }
+
+
+stats = ConnectionStats()
+
+
+def connection_opened(sender, connection, **kwargs):
+    stats.add(connection.alias, 'opened')
+    metrics.record_connection()
+
+
+def check_connections(**kwargs):
+    '''Проверяет открытые соединения перед запросом, неживые закрывает.'''
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if settings.BLOG_CONN_HEALTH_CHECKS:
+            stats.add(connection.alias, 'checks')
+            if not connection.is_usable():
+                stats.add(connection.alias, 'failed_checks')
+                connection.close()
+                continue
+        stats.add(connection.alias, 'reused')
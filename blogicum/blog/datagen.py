@@ -0,0 +1,129 @@
+'''Генерация синтетических данных блога в рабочих процессах.
+
+Функции не обращаются к Django: процессы пула только создают
+значения полей, а вставляет их в базу родительский процесс. Каждый
+кусок получает своё зерно из общего seed и номера куска, поэтому
+результат не зависит от числа процессов.
+'''
+import random
+from datetime import timedelta
+
+from faker import Faker
+
+LOCALE = 'ru_RU'
+# Показатель распределения Парето числа комментариев к посту:
+# чем меньше, тем длиннее хвост популярных постов.
+COMMENT_TAIL = 1.16
+
+_context = {}
+
+
+def init_worker(context):
+    '''Инициализатор пула: общие для всех кусков id и параметры.'''
+    _context.clear()
+    _context.update(context)
+
+
+def chunk_random(seed, kind, index):
+    state = random.Random(f'{seed}:{kind}:{index}')
+    faker = Faker(LOCALE)
+    faker.seed_instance(state.getrandbits(64))
+    return state, faker
+
+
+def users_chunk(spec):
+    index, start, size = spec
+    state, faker = chunk_random(_context['seed'], 'users', index)
+    return [
+        {
+            'username': f'{faker.user_name()}_{start + i}'[:150],
+            'first_name': faker.first_name(),
+            'last_name': faker.last_name(),
+            'email': faker.email(),
+            'date_joined': _context['now'] - timedelta(
+                days=state.uniform(0, _context['days'])
+            ),
+        }
+        for i in range(size)
+    ]
+
+
+def posts_chunk(spec):
+    '''Посты с датами за последние days дней.
+
+    Доля future_share отложена в будущее, доля unpublished_share
+    скрыта автором, у части постов нет места. Прошлые посты созданы
+    незадолго до публикации, отложенные — в последние дни.
+    '''
+    index, start, size = spec
+    context = _context
+    state, faker = chunk_random(context['seed'], 'posts', index)
+    rows = []
+    for _ in range(size):
+        if state.random() < context['future_share']:
+            offset = state.uniform(0, 30)
+            created_at = context['now'] - timedelta(days=state.uniform(0, 7))
+        else:
+            offset = -state.uniform(0, context['days'])
+            created_at = context['now'] + timedelta(
+                days=offset, hours=-state.uniform(0, 48)
+            )
+        location_ids = context['location_ids']
+        rows.append({
+            'title': faker.sentence(nb_words=state.randint(2, 8))[:256],
+            'text': '\n\n'.join(
+                faker.paragraph(nb_sentences=state.randint(2, 8))
+                for _ in range(state.randint(1, 5))
+            ),
+            'pub_date': context['now'] + timedelta(days=offset),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'is_published': state.random() >= context['unpublished_share'],
+            'author_id': state.choice(context['user_ids']),
+            'category_id': state.choice(context['category_ids']),
+            'location_id': (
+                state.choice(location_ids)
+                if location_ids and state.random() < 0.7 else None
+            ),
+        })
+    return rows
+
+
+def comment_counts(seed, posts, comments):
+    '''Число комментариев у каждого поста: длинный хвост Парето.'''
+    state = random.Random(f'{seed}:comment-counts')
+    weights = [state.paretovariate(COMMENT_TAIL) for _ in range(posts)]
+    scale = comments / sum(weights) if weights else 0
+    counts = [int(weight * scale) for weight in weights]
+    # Остаток от округления достаётся самым популярным постам.
+    for position in sorted(
+        range(posts), key=weights.__getitem__, reverse=True
+    )[:comments - sum(counts)]:
+        counts[position] += 1
+    return counts
+
+
+def comments_chunk(spec):
+    '''Комментарии в случайные моменты от публикации поста до now.'''
+    index, post_ids, counts, ages = spec
+    state, faker = chunk_random(_context['seed'], 'comments', index)
+    return [
+        {
+            'post_id': post_id,
+            'author_id': state.choice(_context['user_ids']),
+            'text': faker.sentence(nb_words=state.randint(3, 30)),
+            'created_at': _context['now'] - timedelta(
+                seconds=state.uniform(0, age)
+            ),
+        }
+        for post_id, count, age in zip(post_ids, counts, ages)
+        for _ in range(count)
+    ]
+
+
+def chunks(total, size):
+    '''Куски (номер, начало, размер) для total записей.'''
+    return [
+        (index, start, min(size, total - start))
+        for index, start in enumerate(range(0, total, size))
+    ]
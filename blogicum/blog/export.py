@@ -0,0 +1,139 @@
+'''Потоковая выгрузка постов и комментариев в JSONL и CSV.
+
+Водяная метка — пара (created_at, id) последней выгруженной строки,
+записывается как «<ISO-время>,<id>». created_at ставится один раз при
+создании и не бывает в будущем, id разводит строки с одинаковым
+временем. pub_date меткой не служит: его можно перенести назад или
+запланировать вперёд, и такие записи выпали бы из выгрузки.
+
+Строка, транзакция которой зафиксировалась позже соседних, может
+получить created_at меньше уже выданной метки. Для неё есть окно
+перекрытия overlap: повторно выгружаются все строки новее
+«метка − overlap», а потребитель отбрасывает дубли по id. Окно должно
+быть не меньше самой долгой пишущей транзакции.
+'''
+import csv
+import math
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORTS = {
+    'posts': (Post, (
+        'id', 'title', 'text', 'pub_date', 'created_at', 'is_published',
+        'author__username', 'category__slug', 'category__title',
+        'location__name', 'comment_count', 'image',
+    )),
+    'comments': (Comment, (
+        'id', 'post_id', 'author__username', 'text', 'created_at',
+        'is_published',
+    )),
+}
+
+
+def export_rows(kind, since=None, chunk_size=CHUNK_SIZE,
+                overlap=timedelta(0)):
+    '''Кортежи значений колонок выгрузки по возрастанию (created_at, id).
+
+    since — пара (момент, id) из parse_since; id может быть None, тогда
+    выгружаются строки строго новее момента. С ненулевым overlap
+    выгружаются все строки новее «момент − overlap». Связанные автор,
+    категория и место берутся тем же запросом; строки читаются
+    с сервера кусками по chunk_size.
+    '''
+    model, names = EXPORTS[kind]
+    queryset = model.objects.order_by('created_at', 'id')
+    if since is not None:
+        moment, last_id = since
+        if overlap:
+            queryset = queryset.filter(created_at__gt=moment - overlap)
+        elif last_id is None:
+            queryset = queryset.filter(created_at__gt=moment)
+        else:
+            queryset = queryset.filter(
+                Q(created_at__gt=moment)
+                | Q(created_at=moment, id__gt=last_id)
+            )
+    return queryset.values_list(*names).iterator(chunk_size=chunk_size)
+
+
+def format_since(moment, last_id):
+    '''Водяная метка «<ISO-время>,<id>» для следующей выгрузки.'''
+    return f'{moment.isoformat()},{last_id}'
+
+
+def parse_since(value):
+    '''Водяная метка (момент, id) из «<ISO-время>[,<id>]» или ISO-даты.'''
+    if not value:
+        return None
+    value, _, last_id = value.partition(',')
+    if last_id and not last_id.isdigit():
+        raise ValueError(f'Некорректный id в метке: {last_id}')
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Некорректная дата: {value}')
+        moment = timezone.datetime.combine(day, timezone.datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, int(last_id) if last_id else None
+
+
+def parse_overlap(value):
+    '''Окно перекрытия из числа секунд: конечного и неотрицательного.'''
+    if value in (None, ''):
+        return timedelta(0)
+    seconds = float(value)
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f'Некорректное окно перекрытия: {value}')
+    try:
+        return timedelta(seconds=seconds)
+    except OverflowError as error:
+        raise ValueError(
+            f'Слишком большое окно перекрытия: {value}'
+        ) from error
+
+
+def columns(kind):
+    return EXPORTS[kind][1]
+
+
+class Echo:
+    '''Файлоподобный объект, который возвращает записанное, а не хранит.'''
+
+    def write(self, value):
+        return value
+
+
+def iter_jsonl(kind, rows):
+    names = columns(kind)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def iter_csv(kind, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns(kind))
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in row
+        )
+
+
+def iter_export(kind, export_format, rows):
+    '''Строки выгрузки в формате jsonl или csv по одной записи.'''
+    writers = {'jsonl': iter_jsonl, 'csv': iter_csv}
+    return writers[export_format](kind, rows)
@@ -1,5 +1,6 @@
 from django import forms
 
+from .image_jobs import image_queue
 from .models import Comment, Post, User
 
 
@@ -16,6 +17,14 @@ class PostForm(forms.ModelForm):
             )
         }
 
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            self.instance.thumbnail_format = ''
+        post = super().save(commit)
+        if commit and post.image and 'image' in self.changed_data:
+            image_queue.enqueue(post)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     '''Форма комментария.'''
@@ -0,0 +1,189 @@
+import functools
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import caching
+from .models import ImageJob, Post
+from .thumbnails import build_thumbnails, thumbnail_format
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = timedelta(minutes=10)
+
+
+def mark_thumbnails(post_id, image_name, image_format):
+    '''Записывает в пост формат готовых миниатюр, если фото то же.'''
+    return Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnail_format=image_format
+    )
+
+
+class ImageQueue:
+    '''Очередь обработки изображений в ограниченном пуле процессов.
+
+    Задачи хранятся в таблице ImageJob и переживают перезапуск:
+    очередь добирает из неё ожидающие и зависшие задачи при каждой
+    новой загрузке и в команде process_image_jobs. Запросы только
+    ставят задачу и не ждут декодирования и сжатия.
+    '''
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._executor = None
+        self._finished = queue.SimpleQueue()
+        self._dispatcher = None
+
+    def enqueue(self, post):
+        '''Ставит изображение поста в очередь после коммита транзакции.'''
+        job = ImageJob.objects.create(post=post, image=post.image.name)
+        transaction.on_commit(self.fill)
+        return job
+
+    def claim(self):
+        '''Помечает самую старую ожидающую задачу как выполняемую.'''
+        now = timezone.now()
+        ImageJob.objects.filter(
+            status=ImageJob.RUNNING, updated_at__lt=now - STALE_AFTER
+        ).update(status=ImageJob.PENDING, updated_at=now)
+        candidates = self.pending().values_list('pk', flat=True)
+        for pk in candidates[:settings.BLOG_IMAGE_MAX_PENDING]:
+            claimed = ImageJob.objects.filter(
+                pk=pk, status=ImageJob.PENDING
+            ).update(
+                status=ImageJob.RUNNING,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+            if claimed:
+                return ImageJob.objects.get(pk=pk)
+        return None
+
+    def fill(self):
+        '''Отправляет в пул ожидающие задачи, пока есть свободные места.'''
+        if not settings.BLOG_IMAGE_WORKERS:
+            while (job := self.claim()) is not None:
+                self.run(job)
+            return
+        while True:
+            with self._condition:
+                if self._in_flight >= settings.BLOG_IMAGE_MAX_PENDING:
+                    return
+                job = self.claim()
+                if job is None:
+                    return
+                self._in_flight += 1
+            image_format = thumbnail_format()
+            try:
+                future = self.get_executor().submit(
+                    build_thumbnails, self.source_path(job), image_format
+                )
+            except Exception as error:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._executor = None
+                self.complete(job, error)
+                return
+            future.add_done_callback(functools.partial(
+                self._finish, job, image_format
+            ))
+
+    def run(self, job):
+        '''Обрабатывает задачу в текущем процессе.'''
+        image_format = thumbnail_format()
+        try:
+            build_thumbnails(self.source_path(job), image_format)
+        except Exception as error:
+            self.complete(job, error)
+        else:
+            self.complete(job, image_format=image_format)
+
+    def complete(self, job, error=None, image_format=None):
+        '''Итог задачи; успех записывает в пост формат миниатюр.'''
+        pk = job.pk
+        if error is None:
+            ImageJob.objects.filter(pk=pk).update(
+                status=ImageJob.DONE, error='', updated_at=timezone.now()
+            )
+            mark_thumbnails(job.post_id, job.image, image_format)
+            caching.invalidate_feeds()
+            return
+        logger.warning('Обработка изображения %s не удалась: %s', pk, error)
+        ImageJob.objects.filter(pk=pk).update(
+            status=Case(
+                When(
+                    attempts__gte=settings.BLOG_IMAGE_MAX_ATTEMPTS,
+                    then=Value(ImageJob.FAILED),
+                ),
+                default=Value(ImageJob.PENDING),
+            ),
+            error=str(error),
+            updated_at=timezone.now(),
+        )
+
+    def pending(self):
+        return ImageJob.objects.filter(
+            status=ImageJob.PENDING,
+            attempts__lt=settings.BLOG_IMAGE_MAX_ATTEMPTS,
+        )
+
+    def drain(self):
+        '''Обрабатывает все ожидающие задачи и ждёт их завершения.'''
+        while True:
+            self.fill()
+            with self._condition:
+                self._condition.wait_for(lambda: self._in_flight == 0)
+            if not self.pending().exists():
+                return
+
+    def source_path(self, job):
+        return Post._meta.get_field('image').storage.path(job.image)
+
+    def get_executor(self):
+        with self._condition:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=settings.BLOG_IMAGE_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch,
+                    name='image-jobs',
+                    daemon=True,
+                )
+                self._dispatcher.start()
+            return self._executor
+
+    def _finish(self, job, image_format, future):
+        self._finished.put((job, image_format, future))
+
+    def _dispatch(self):
+        '''Записывает результаты пула в базу в отдельном потоке.'''
+        while True:
+            job, image_format, future = self._finished.get()
+            try:
+                self.complete(job, future.exception(), image_format)
+            except Exception:
+                logger.exception('Сбой очереди обработки изображений')
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+            try:
+                self.fill()
+            except Exception:
+                logger.exception('Сбой очереди обработки изображений')
+            finally:
+                connections.close_all()
+
+
+image_queue = ImageQueue()
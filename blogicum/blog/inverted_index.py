@@ -0,0 +1,303 @@
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Post
+from .stemmer import stem
+
+MAGIC = b'BLIX'
+FORMAT_VERSION = 1
+# Сигнатура, версия формата и длина каталога термов.
+HEADER = struct.Struct('<4sII')
+WORD_RE = re.compile(r'\w+')
+# Запас на транзакции, зафиксированные позже, чем взята их updated_at.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def terms(text):
+    '''Основы слов текста.'''
+    return {stem(word) for word in WORD_RE.findall(text.lower())}
+
+
+def encode(ids):
+    '''Сжимает возрастающий список id в разности соседних значений.'''
+    deltas = array('I', ids)
+    for i in range(len(deltas) - 1, 0, -1):
+        deltas[i] -= deltas[i - 1]
+    return deltas
+
+
+def decode(deltas):
+    return list(accumulate(deltas))
+
+
+class InvertedIndex:
+    '''Инвертированный индекс постов в памяти процесса.
+
+    Пост — документ из заголовка, текста и комментариев к нему.
+    Для каждой основы слова хранится возрастающий список id постов,
+    сжатый в разности соседних значений. Снимок индекса пишется в
+    файл и загружается через mmap: списки читаются прямо из файла и
+    копируются в память только при изменении.
+
+    Сигналы обновляют индекс своего процесса, только если он уже
+    загружен: незагруженный индекс догонит базу при загрузке, а при
+    FTS5 он не загружается вовсе. Записи других процессов индекс
+    догоняет не чаще раза в BLOG_SEARCH_INDEX_REFRESH_SECONDS:
+    перечитывает снимок, если файл сменился, и переиндексирует посты,
+    изменённые после метки синхронизации (комментарии сдвигают
+    updated_at поста). Удалённые посты остаются в индексе до
+    пересборки, но их отсекает выборка видимых постов.
+    '''
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._documents = {}
+        self._mmap = None
+        self._mtime = None
+        self._synced_at = None
+        self._checked = None
+        self.loaded = False
+
+    @property
+    def path(self):
+        return Path(settings.BLOG_SEARCH_INDEX_PATH)
+
+    @property
+    def document_count(self):
+        return len(self._documents)
+
+    @property
+    def term_count(self):
+        return len(self._postings)
+
+    def search(self, query):
+        '''id постов, содержащих все слова запроса, по возрастанию.'''
+        self.ensure_loaded()
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms(query)]
+            if not postings or None in postings:
+                return []
+            postings.sort(key=len)
+            found = decode(postings[0])
+            for deltas in postings[1:]:
+                found = sorted(set(found).intersection(decode(deltas)))
+                if not found:
+                    break
+            return found
+
+    def update(self, post_id):
+        '''Переиндексирует пост; удалённый пост убирается из индекса.'''
+        with self._lock:
+            if self.loaded:
+                self._reindex(post_id)
+
+    def _reindex(self, post_id):
+        row = Post.objects.filter(pk=post_id).values('title', 'text').first()
+        new = set()
+        if row is not None:
+            comments = Comment.objects.filter(post_id=post_id).values_list(
+                'text', flat=True
+            )
+            new = terms(' '.join([row['title'], row['text'], *comments]))
+        old = self._documents.pop(post_id, set())
+        for term in old - new:
+            ids = decode(self._postings[term])
+            ids.pop(bisect_left(ids, post_id))
+            if ids:
+                self._postings[term] = encode(ids)
+            else:
+                del self._postings[term]
+        for term in new - old:
+            ids = decode(self._postings.get(term, ()))
+            ids.insert(bisect_left(ids, post_id), post_id)
+            self._postings[term] = encode(ids)
+        if new:
+            self._documents[post_id] = new
+
+    def rebuild(self):
+        '''Строит индекс заново по всем постам и комментариям.'''
+        synced_at = timezone.now()
+        documents = {
+            pk: [title, text]
+            for pk, title, text in Post.objects.values_list(
+                'pk', 'title', 'text'
+            ).iterator()
+        }
+        for post_id, text in Comment.objects.values_list(
+            'post_id', 'text'
+        ).iterator():
+            if post_id in documents:
+                documents[post_id].append(text)
+        postings = {}
+        for post_id in sorted(documents):
+            words = terms(' '.join(documents[post_id]))
+            documents[post_id] = words
+            for term in words:
+                postings.setdefault(term, []).append(post_id)
+        with self._lock:
+            self._close()
+            self._postings = {
+                term: encode(ids) for term, ids in postings.items()
+            }
+            self._documents = documents
+            self._synced_at = synced_at
+            self._checked = time.monotonic()
+            self.loaded = True
+
+    def save(self, path=None):
+        '''Пишет снимок индекса атомарной заменой файла.'''
+        path = Path(path or self.path)
+        self.ensure_loaded()
+        with self._lock:
+            vocabulary = sorted(self._postings)
+            term_ids = {term: i for i, term in enumerate(vocabulary)}
+            blob = array('I')
+            directory = {
+                'terms': [], 'documents': [],
+                'synced_at': self._synced_at and self._synced_at.isoformat(),
+            }
+            for term in vocabulary:
+                directory['terms'].append(
+                    [term, len(blob), len(self._postings[term])]
+                )
+                blob.extend(self._postings[term])
+            for post_id in sorted(self._documents):
+                ids = sorted(
+                    term_ids[term] for term in self._documents[post_id]
+                )
+                directory['documents'].append([post_id, len(blob), len(ids)])
+                blob.extend(encode(ids))
+        header = json.dumps(directory, ensure_ascii=False).encode()
+        # Выравнивание, чтобы массивы можно было читать из mmap как uint32.
+        header += b' ' * (-(HEADER.size + len(header)) % blob.itemsize)
+        temporary = path.with_name(f'.{path.name}.tmp')
+        with open(temporary, 'wb') as snapshot:
+            snapshot.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+            snapshot.write(header)
+            blob.tofile(snapshot)
+        os.replace(temporary, path)
+        if path == self.path:
+            self._mtime = path.stat().st_mtime_ns
+        return path
+
+    def load(self, path=None):
+        '''Загружает снимок; False, если файла нет или формат другой.'''
+        path = Path(path or self.path)
+        try:
+            with open(path, 'rb') as snapshot:
+                mtime = os.fstat(snapshot.fileno()).st_mtime_ns
+                mapped = mmap.mmap(
+                    snapshot.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (FileNotFoundError, ValueError):
+            return False
+        try:
+            magic, version, length = HEADER.unpack_from(mapped)
+        except struct.error:
+            magic = version = length = None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mapped.close()
+            return False
+        directory = json.loads(mapped[HEADER.size:HEADER.size + length])
+        blob = memoryview(mapped)[HEADER.size + length:].cast('I')
+        vocabulary = [term for term, _, _ in directory['terms']]
+        postings = {
+            term: blob[offset:offset + size]
+            for term, offset, size in directory['terms']
+        }
+        documents = {
+            post_id: {
+                vocabulary[i] for i in decode(blob[offset:offset + size])
+            }
+            for post_id, offset, size in directory['documents']
+        }
+        with self._lock:
+            self._close()
+            self._mmap = (mapped, blob)
+            self._postings = postings
+            self._documents = documents
+            self._synced_at = parse_datetime(directory.get('synced_at') or '')
+            self._mtime = mtime if path == self.path else None
+            self._checked = time.monotonic()
+            self.loaded = True
+        return True
+
+    def ensure_loaded(self):
+        '''Загружает снимок, а без него строит индекс по базе.'''
+        if self.loaded:
+            self.refresh()
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            if self.load():
+                self._catch_up()
+            else:
+                self.rebuild()
+
+    def refresh(self):
+        '''Догоняет снимок и записи других процессов, если пора.'''
+        interval = settings.BLOG_SEARCH_INDEX_REFRESH_SECONDS
+        if (
+            self._checked is not None
+            and time.monotonic() - self._checked < interval
+        ):
+            return
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None and mtime != self._mtime:
+                self.load()
+            self._catch_up()
+
+    def _catch_up(self):
+        if self._synced_at is None:
+            return
+        synced_at = timezone.now()
+        changed = Post.objects.filter(
+            updated_at__gte=self._synced_at - SYNC_OVERLAP
+        ).values_list('pk', flat=True)
+        for post_id in changed:
+            self._reindex(post_id)
+        self._synced_at = synced_at
+
+    def reset(self):
+        with self._lock:
+            self._close()
+            self._postings = {}
+            self._documents = {}
+            self._mtime = self._synced_at = self._checked = None
+            self.loaded = False
+
+    def _close(self):
+        if self._mmap is None:
+            return
+        mapped, blob = self._mmap
+        self._mmap = None
+        # Списки из снимка ещё могут понадобиться: копируем их в память.
+        self._postings = {
+            term: array('I', deltas) for term, deltas in self._postings.items()
+        }
+        blob.release()
+        mapped.close()
+
+
+search_index = InvertedIndex()
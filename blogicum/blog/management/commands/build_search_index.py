@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from blog.inverted_index import search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит инвертированный индекс поиска и сохраняет его снимок, '
+        'который процессы сайта загружают при первом поиске.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Файл снимка вместо BLOG_SEARCH_INDEX_PATH.',
+        )
+
+    def handle(self, *args, **options):
+        search_index.rebuild()
+        path = search_index.save(options['path'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс сохранён в {path}: '
+            f'постов {search_index.document_count}, '
+            f'основ {search_index.term_count}'
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.template_cache import compile_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны и проверяет шаблоны из {% extends %} и '
+        '{% include %}. Завершается с ошибкой, если хоть один не собрался.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count, errors = compile_templates()
+        for name, error in sorted(errors.items()):
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}.')
+        self.stdout.write(
+            f'Шаблонов: {count} '
+            f'({(time.perf_counter() - started) * 1000:.0f} мс)'
+        )
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import (CHUNK_SIZE, EXPORTS, FORMATS, columns, export_rows,
+                         format_since, iter_export, parse_overlap,
+                         parse_since)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты или комментарии в JSONL или CSV потоково. '
+        'С --since выгружаются только записи новее водяной метки '
+        '(created_at, id); метка для следующего запуска печатается '
+        'в stderr.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument(
+            '--format', default='jsonl', choices=sorted(FORMATS),
+        )
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='Файл выгрузки; «-» — stdout.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Водяная метка «<ISO-время>,<id>»: выгрузить записи '
+                 'строго новее неё.',
+        )
+        parser.add_argument(
+            '--overlap', default='0',
+            help='Окно перекрытия в секундах: повторно выгрузить записи '
+                 'новее «метка − окно», чтобы не потерять поздно '
+                 'зафиксированные; дубли отбрасываются по id.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        try:
+            rows = export_rows(
+                kind,
+                since=parse_since(options['since']),
+                chunk_size=options['chunk_size'],
+                overlap=parse_overlap(options['overlap']),
+            )
+        except ValueError as error:
+            raise CommandError(error) from error
+        position = columns(kind).index('created_at')
+        id_position = columns(kind).index('id')
+        latest = count = None
+
+        def tracked():
+            nonlocal latest, count
+            for count, row in enumerate(rows, 1):
+                latest = row[position], row[id_position]
+                yield row
+
+        lines = iter_export(kind, options['format'], tracked())
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as output:
+                output.writelines(lines)
+        self.stderr.write(f'Выгружено записей: {count or 0}')
+        if latest is not None:
+            self.stderr.write(f'Водяная метка: {format_since(*latest)}')
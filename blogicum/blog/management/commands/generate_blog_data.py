@@ -0,0 +1,224 @@
+import multiprocessing
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from faker import Faker
+
+from blog import datagen
+from blog.bulk import fill_timestamps, finish_bulk_load
+from blog.models import Category, Comment, Location, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местами, постами и комментариями для нагрузочных тестов. '
+        'При одинаковом --seed результат одинаков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument('--days', type=int, default=730,
+                            help='Глубина истории постов в днях.')
+        parser.add_argument('--future-share', type=float, default=0.05,
+                            help='Доля отложенных постов.')
+        parser.add_argument('--unpublished-share', type=float, default=0.05,
+                            help='Доля скрытых постов.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int,
+                            default=multiprocessing.cpu_count(),
+                            help='0 — генерировать в текущем процессе.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--password', default='blogicum',
+            help='Пароль всех пользователей; хешируется один раз.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 0:
+            raise CommandError(
+                'Размер пачки должен быть положительным, '
+                'число процессов — неотрицательным.'
+            )
+        self.options = options
+        self.started = time.monotonic()
+        context = {
+            'seed': options['seed'],
+            'now': timezone.now(),
+            'days': options['days'],
+            'future_share': options['future_share'],
+            'unpublished_share': options['unpublished_share'],
+        }
+        try:
+            with transaction.atomic():
+                self.generate(context)
+                finish_bulk_load({User, Category, Location, Post, Comment})
+        except IntegrityError as error:
+            raise CommandError(
+                f'Данные конфликтуют с уже существующими: {error}'
+            ) from error
+
+    def generate(self, context):
+        options = self.options
+        new_users = self.run(
+            datagen.users_chunk, context,
+            datagen.chunks(options['users'], options['batch_size']),
+            self.insert_users,
+        )
+        context['user_ids'] = new_users
+        context['category_ids'] = self.small_models(context)
+        context['location_ids'] = list(
+            Location.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        if not context['user_ids'] or not context['category_ids']:
+            raise CommandError('Для постов нужны пользователи и категории.')
+        post_ids = self.run(
+            datagen.posts_chunk, context,
+            datagen.chunks(options['posts'], options['batch_size']),
+            lambda rows: self.insert(Post, rows),
+        )
+        counts = datagen.comment_counts(
+            options['seed'], len(post_ids), options['comments']
+        )
+        self.run(
+            datagen.comments_chunk, context,
+            self.comment_chunks(post_ids, counts, context['now']),
+            lambda rows: self.insert(Comment, rows),
+        )
+
+    def run(self, function, context, specs, insert):
+        '''Генерирует куски в пуле процессов и вставляет их по порядку.
+
+        В работе не больше двух кусков на процесс: готовые пачки не
+        копятся в памяти, пока родитель вставляет предыдущие.
+        Возвращает id вставленных записей.
+        '''
+        inserted = []
+        workers = self.options['workers']
+        if workers:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=datagen.init_worker,
+                initargs=(context,),
+            )
+            with executor:
+                pending = deque()
+                for spec in specs:
+                    pending.append(executor.submit(function, spec))
+                    if len(pending) >= workers * 2:
+                        inserted += insert(pending.popleft().result())
+                while pending:
+                    inserted += insert(pending.popleft().result())
+        else:
+            datagen.init_worker(context)
+            for spec in specs:
+                inserted += insert(function(spec))
+        name = function.__name__.replace('_chunk', '')
+        self.stdout.write(
+            f'{name}: {len(inserted)} '
+            f'({time.monotonic() - self.started:.1f} с с начала)'
+        )
+        return inserted
+
+    def insert(self, model, rows):
+        '''Вставляет пачку и возвращает id новых записей по порядку.
+
+        Вставка raw, как у loaddata: заданные created_at и updated_at
+        не перезаписываются текущим временем.
+        '''
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        objs = [model(**row) for row in rows]
+        for obj in objs:
+            fill_timestamps(obj)
+        fields = [
+            field for field in model._meta.local_concrete_fields
+            if field != model._meta.pk
+        ]
+        size = max(1, min(
+            self.options['batch_size'],
+            connection.ops.bulk_batch_size(fields, objs),
+        ))
+        for start in range(0, len(objs), size):
+            model._base_manager._insert(
+                objs[start:start + size], fields=fields, raw=True
+            )
+        return list(
+            model.objects.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def insert_users(self, rows):
+        password = getattr(self, '_password', None)
+        if password is None:
+            # Соль из seed, чтобы и хеш пароля воспроизводился.
+            salt = random.Random(self.options['seed']).randbytes(16).hex()
+            password = self._password = make_password(
+                self.options['password'], salt=salt
+            )
+        for row in rows:
+            row['password'] = password
+        return self.insert(User, rows)
+
+    def small_models(self, context):
+        '''Категории и места; каждая десятая категория скрыта.'''
+        state = random.Random(f'{context["seed"]}:small')
+        faker = Faker(datagen.LOCALE)
+        faker.seed_instance(context['seed'])
+        offset = Category.objects.count()
+        categories = self.insert(Category, [
+            {
+                'title': faker.catch_phrase()[:256],
+                'description': faker.paragraph(nb_sentences=3),
+                'slug': f'category-{offset + i}',
+                'is_published': i % 10 != 9,
+            }
+            for i in range(self.options['categories'])
+        ])
+        self.insert(Location, [
+            {
+                'name': faker.city()[:256],
+                'is_published': state.random() > 0.1,
+            }
+            for _ in range(self.options['locations'])
+        ])
+        return categories
+
+    def comment_chunks(self, post_ids, counts, now):
+        '''Куски постов, в сумме примерно на batch_size комментариев.
+
+        Для каждого поста в кусок идёт и его возраст в секундах:
+        комментарии появляются между публикацией поста и now.
+        '''
+        if not post_ids:
+            return
+        dates = Post.objects.filter(
+            pk__gte=post_ids[0], pk__lte=post_ids[-1]
+        ).order_by('pk').values_list('pub_date', flat=True)
+        index, ids, sizes, ages, total = 0, [], [], [], 0
+        for post_id, count, pub_date in zip(
+            post_ids, counts, dates.iterator()
+        ):
+            if not count:
+                continue
+            ids.append(post_id)
+            sizes.append(count)
+            ages.append(max(0.0, (now - pub_date).total_seconds()))
+            total += count
+            if total >= self.options['batch_size']:
+                yield index, ids, sizes, ages
+                index, ids, sizes, ages, total = index + 1, [], [], [], 0
+        if ids:
+            yield index, ids, sizes, ages
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from blog import caching
+from blog.image_jobs import mark_thumbnails
+from blog.models import Post
+from blog.thumbnails import generate_thumbnails, thumbnail_format
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие миниатюры изображений постов и записывает '
+        'в посты их формат.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать и уже существующие миниатюры.',
+        )
+
+    def handle(self, *args, **options):
+        created = skipped = 0
+        image_format = thumbnail_format()
+        posts = Post.objects.exclude(image='').only(
+            'id', 'image', 'thumbnail_format'
+        )
+        for post in posts.iterator():
+            try:
+                names = generate_thumbnails(post.image, options['force'])
+            except (OSError, ValueError) as error:
+                skipped += 1
+                self.stderr.write(f'Пост {post.id}: {error}')
+                continue
+            created += len(names)
+            if post.thumbnail_format != image_format:
+                mark_thumbnails(post.id, post.image.name, image_format)
+        caching.invalidate_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано миниатюр: {created}, пропущено постов: {skipped}'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog.image_jobs import image_queue
+from blog.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает задачи обработки изображений, оставшиеся в очереди, '
+        'например после перезапуска сервера.'
+    )
+
+    def handle(self, *args, **options):
+        image_queue.drain()
+        failed = ImageJob.objects.filter(status=ImageJob.FAILED).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Очередь обработана, задач с ошибкой: {failed}'
+        ))
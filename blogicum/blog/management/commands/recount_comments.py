@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчик комментариев у постов. '
+        'Нужен после loaddata и прямых правок базы.'
+    )
+
+    def handle(self, *args, **options):
+        updated = Post.objects.recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано постов: {updated}')
+        )
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.routers import PRIMARY
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик BLOG_READ_REPLICAS. '
+        'Заменяет репликацию при локальной проверке маршрутизации.'
+    )
+
+    def handle(self, *args, **options):
+        source = connections[PRIMARY]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копировать можно только базу SQLite.')
+        if not settings.BLOG_READ_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте BLOG_REPLICAS.')
+        source.ensure_connection()
+        for alias in settings.BLOG_READ_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            path = str(replica.settings_dict['NAME'])
+            target = sqlite3.connect(path)
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {path}')
@@ -0,0 +1,127 @@
+'''Метрики текущего запроса: SQL, шаблоны, кэш.
+
+Метрики живут в contextvar, поэтому код блога отмечает в них события
+без доступа к request, а вне запроса отметки ничего не делают.
+'''
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+_current = ContextVar('blog_request_metrics', default=None)
+
+
+class RequestMetrics:
+    '''Счётчики и время одного запроса, в миллисекундах.'''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.connections = 0
+        self.fragments = {}
+        self.statements = Counter()
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        '''Обёртка connection.execute_wrapper: считает и замеряет SQL.'''
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.statements[sql] += 1
+
+    @property
+    def view_time(self):
+        '''Время запроса без рендеринга шаблона.'''
+        return max(self.total_time - self.template_time, 0.0)
+
+    @property
+    def duplicates(self):
+        '''Сколько раз повторился самый частый запрос — признак N+1.'''
+        if not self.statements:
+            return 0
+        return self.statements.most_common(1)[0][1]
+
+    def finish(self):
+        self.total_time = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.sql_time:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time:.1f}',
+            f'view;dur={self.view_time:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+            f'total;dur={self.total_time:.1f}',
+        ))
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'duplicates': self.duplicates,
+            'sql_ms': round(self.sql_time, 1),
+            'template_ms': round(self.template_time, 1),
+            'view_ms': round(self.view_time, 1),
+            'total_ms': round(self.total_time, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'connections_opened': self.connections,
+            'fragments': {
+                name: {**counts, 'ms': round(counts['ms'], 1)}
+                for name, counts in self.fragments.items()
+            },
+        }
+
+
+def resume(metrics):
+    '''Делает метрики текущими, в том числе снова на время отдачи потока.'''
+    return _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_cache(hit):
+    '''Отмечает попадание или промах кэша в метриках запроса.'''
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def record_template(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.template_time += duration
+
+
+def record_connection():
+    '''Отмечает новое соединение с базой, открытое за время запроса.'''
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.connections += 1
+
+
+def record_fragment(name, hit, duration):
+    '''Отмечает вывод фрагмента: попадание в кэш и время с рендерингом.'''
+    metrics = _current.get()
+    if metrics is None:
+        return
+    counts = metrics.fragments.setdefault(
+        name, {'hits': 0, 'misses': 0, 'ms': 0.0}
+    )
+    counts['hits' if hit else 'misses'] += 1
+    counts['ms'] += duration
@@ -0,0 +1,184 @@
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routers
+from .backends.sqlite3.base import deferred_transactions
+from .connections import stats as connection_stats
+
+logger = logging.getLogger('blog.requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def thresholds(view_name):
+    '''Пороги для имени URL поверх порогов по умолчанию.'''
+    limits = dict(settings.BLOG_REQUEST_THRESHOLDS['default'])
+    limits.update(settings.BLOG_REQUEST_THRESHOLDS.get(view_name, {}))
+    return limits
+
+
+def flags(record, limits):
+    '''Какие пороги превысил запрос.'''
+    checks = (
+        ('slow', record['total_ms'], limits['total_ms']),
+        ('many_queries', record['queries'], limits['queries']),
+        ('n_plus_one', record['duplicates'], limits['duplicates']),
+    )
+    return [name for name, value, limit in checks if value > limit]
+
+
+class RequestMetricsMiddleware:
+    '''Замеряет SQL, шаблоны и кэш каждого запроса.
+
+    Итог уходит в заголовок Server-Timing и строкой JSON в лог
+    blog.requests; запросы сверх порогов BLOG_REQUEST_THRESHOLDS
+    пишутся с уровнем WARNING. Потоковый ответ замеряется до конца
+    отдачи: запросы к базе идут, пока читается его содержимое, поэтому
+    итог пишется в лог при закрытии потока, уже без Server-Timing.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        current = metrics.RequestMetrics()
+        with self.measure(current):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = MeasuredStream(
+                self, request, response, current
+            )
+            return response
+        current.finish()
+        self.report(request, response, current)
+        return response
+
+    @contextmanager
+    def measure(self, current):
+        '''Отмечает метрики текущими и замеряет SQL всех соединений.'''
+        token = metrics.resume(current)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(current))
+                yield
+        finally:
+            metrics.stop(token)
+
+    def process_template_response(self, request, response):
+        current = metrics.current()
+        if current is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: metrics.record_template(
+                    (time.perf_counter() - started) * 1000
+                )
+            )
+        return response
+
+    def report(self, request, response, current):
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            **current.as_dict(),
+            'connections': connection_stats.as_dict(),
+        }
+        record['flags'] = flags(record, thresholds(view_name))
+        if settings.BLOG_SERVER_TIMING and not response.streaming:
+            response['Server-Timing'] = current.server_timing()
+        logger.log(
+            logging.WARNING if record['flags'] else logging.INFO,
+            json.dumps(record, ensure_ascii=False),
+        )
+
+
+class MeasuredStream:
+    '''Содержимое потокового ответа, которое замеряется при отдаче.
+
+    Каждая часть читается под метриками запроса; итог пишется в лог
+    один раз, когда сервер закрывает ответ, даже недочитанный.
+    '''
+
+    def __init__(self, middleware, request, response, current):
+        self.middleware = middleware
+        self.request = request
+        self.response = response
+        self.current = current
+        self.chunks = iter(response.streaming_content)
+        self.reported = False
+
+    def __iter__(self):
+        while True:
+            with self.middleware.measure(self.current):
+                chunk = next(self.chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        if self.reported:
+            return
+        self.reported = True
+        self.current.finish()
+        self.middleware.report(self.request, self.response, self.current)
+
+
+class TransactionModeMiddleware:
+    '''Безопасные запросы открывают транзакции BEGIN, а не BEGIN IMMEDIATE.
+
+    Читающие транзакции в WAL не мешают писателям, поэтому брать для
+    них блокировку на запись незачем.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        with deferred_transactions():
+            return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    '''Разрешает представлениям с replica_reads читать с реплик.
+
+    После запроса, который что-то записал в основную базу, ставит куку
+    PIN_COOKIE: пока она жива, пользователь читает с основной базы
+    и видит свои записи, даже если реплика отстаёт.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        primary = connections[routers.PRIMARY]
+        with routers.routing() as state, primary.execute_wrapper(
+            routers.track_writes
+        ):
+            response = self.get_response(request)
+        if state.wrote:
+            response.set_cookie(
+                routers.PIN_COOKIE, '1',
+                max_age=settings.BLOG_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            request.method in SAFE_METHODS
+            and routers.PIN_COOKIE not in request.COOKIES
+            and getattr(view_class, 'replica_reads', False)
+        ):
+            routers.use_replica()
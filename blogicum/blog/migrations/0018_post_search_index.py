@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from blog.search import install_fts
+    install_fts(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from blog.search import uninstall_fts
+    uninstall_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_imagejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_format',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Пусто, пока миниатюры текущего изображения не готовы.', max_length=8, verbose_name='Формат миниатюр'),
+        ),
+    ]
@@ -1,13 +1,24 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.db.models import Count
-from django.shortcuts import redirect
+from django.core.paginator import InvalidPage
+from django.db.models import Count, Max
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
-from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
 
+from . import caching
 from .forms import CommentForm, PostForm
 from .models import Comment, Post
+from .paginators import (COMMENT_ORDERING, FEED_ORDERING,
+                         CachedCountPaginator, CursorPaginator)
+from .scheduler import schedule
 
 COUNT_OF_POST = 10
+COUNT_OF_COMMENTS = 20
 
 
 class BaseFormMixin:
@@ -15,23 +26,182 @@ class BaseFormMixin:
 
     model = Post
     paginate_by = COUNT_OF_POST
+    feed_scope = 'index'
+
+    def get_feed_scope(self):
+        '''Ключ ленты для кэшей; None отключает их для запроса.'''
+        return self.feed_scope
 
     def get_queryset_comment(self):
         return (
             Post.objects.select_related('author', 'category', 'location')
-            .annotate(comment_count=Count('comments'))
-            .order_by('-pub_date')
+            .order_by(*FEED_ORDERING)
         )
 
     def get_queryset(self):
+        return self.get_queryset_comment().published()
+
+    def get_feed_queryset(self):
+        '''Посты ленты без проверки категории или автора на 404.'''
+        return self.get_queryset()
+
+    def get_validators(self):
+        '''Состояние ленты для ETag без чтения её постов.
+
+        Правки постов, комментариев, категорий, мест и авторов меняют
+        поколение кэша лент. Наступившую отложенную публикацию ловит
+        время ближайшей из них по расписанию ленты: оно в кэше и
+        сменяется, когда пост появляется. Владелец профиля видит свои
+        отложенные посты сразу, и расписание ему не нужно.
+        '''
+        state = {'version': caching.feed_version()}
+        scope = self.get_feed_scope()
+        if scope is not None:
+            state['due'] = schedule.next_due(scope)
+        return state
+
+    def paginate_queryset(self, queryset, page_size):
+        if not settings.BLOG_CURSOR_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return CachedCountPaginator(
+            queryset, per_page, feed_scope=self.get_feed_scope(), **kwargs
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None and not getattr(page, 'is_cursor', False):
+            context['page_range'] = page.paginator.get_elided_page_range(
+                page.number, on_each_side=2, on_ends=1
+            )
+        return context
+
+
+class ConditionalGetMixin:
+    '''Миксин условного GET: ETag до выборки страницы.
+
+    Миксины дальше по MRO дают get_validators(): состояние страницы
+    из кэша или одного лёгкого запроса, или None, если его нет.
+    Last-Modified не отдаётся: время изменения не учитывает ни зрителя,
+    ни снятые с публикации посты. ETag зависит ещё от адреса и зрителя: его
+    сессии входа и CSRF-токена, который вписан в формы страницы. Иначе
+    после повторного входа браузер взял бы из кэша страницу со старым
+    токеном, и отправка формы с неё кончилась бы ошибкой 403.
+    '''
+
+    def get_viewer(self):
+        '''Всё о зрителе, от чего зависит разметка страницы.
+
+        Формы видят только вошедшие пользователи; им токен выдаётся
+        сразу, чтобы ETag этого ответа совпал со следующим запросом.
+        '''
+        user = self.request.user
+        if not user.is_authenticated:
+            return None, self.request.META.get('CSRF_COOKIE')
+        get_token(self.request)
         return (
-            self.get_queryset_comment()
-            .filter(
-                is_published=True,
-                category__is_published=True,
-                pub_date__lte=timezone.now()
+            user.pk, user.get_session_auth_hash(),
+            self.request.META['CSRF_COOKIE'],
+        )
+
+    def get(self, request, *args, **kwargs):
+        state = self.get_validators()
+        if state is None:
+            return super().get(request, *args, **kwargs)
+        digest = hashlib.md5(
+            repr((self.get_viewer(), request.get_full_path(), state))
+            .encode()
+        ).hexdigest()
+        etag = f'W/"{digest}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class FeedCacheMixin:
+    '''Миксин кэширования отрендеренных страниц ленты.
+
+    Ключ ленты берётся из BaseFormMixin.get_feed_scope(). Промах
+    кэша читает с реплики, кроме времени сразу после сброса лент:
+    см. caching.read_for_cache().
+    '''
+
+    def get(self, request, *args, **kwargs):
+        scope = self.get_feed_scope()
+        if scope is None:
+            return super().get(request, *args, **kwargs)
+        key = caching.page_key(scope, request)
+        cached = caching.get_page(key)
+        if cached is not None:
+            return cached
+        # Страница, число постов и валидаторы лягут в общий кэш.
+        caching.read_for_cache()
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda response: caching.set_page(
+                key, response, schedule.timeout(scope)
+            )
+        )
+        return response
+
+
+class CommentPageMixin:
+    '''Миксин постраничного вывода комментариев поста.'''
+
+    comments_per_page = COUNT_OF_COMMENTS
+
+    def get_post(self):
+        return get_object_or_404(
+            Post.objects.select_related('author', 'category', 'location')
+            .visible_to(self.request.user),
+            pk=self.kwargs['post_id'],
+        )
+
+    def get_validators(self):
+        '''Отметки поста, его категории и места и набор комментариев.
+
+        Имена автора поста и комментаторов своих отметок не имеют;
+        их правки сдвигают поколение кэша лент, оно тоже в состоянии.
+        '''
+        state = (
+            Post.objects.visible_to(self.request.user)
+            .filter(pk=self.kwargs['post_id'])
+            .values(
+                'updated_at', 'category__updated_at', 'location__updated_at'
             )
+            .annotate(
+                comment_total=Count('comments'),
+                commented=Max('comments__created_at'),
+            )
+            .first()
+        )
+        if state is None:
+            return None
+        state['version'] = caching.feed_version()
+        return state
+
+    def get_comments_page(self, post):
+        paginator = CursorPaginator(
+            post.comments.select_related('author'),
+            self.comments_per_page,
+            ordering=COMMENT_ORDERING,
         )
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(str(error))
 
 
 class PostMixin(UserPassesTestMixin):
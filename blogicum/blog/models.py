@@ -1,8 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
-from django.utils.html import mark_safe
+from django.utils import timezone
+from django.utils.html import escape, mark_safe
+
+from .thumbnails import thumbnail_url
 
 User = get_user_model()
 AMT_SIGN_TITLE = 30
@@ -25,7 +30,19 @@ class PubCreatModel(models.Model):
         abstract = True
 
 
-class Category(PubCreatModel):
+class PubCreatUpdModel(PubCreatModel):
+    '''Абстрактная модель с отметкой последнего изменения.'''
+
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Category(PubCreatUpdModel):
     '''Модель Категорий.'''
 
     title = models.CharField(max_length=256, verbose_name='Заголовок')
@@ -45,7 +62,7 @@ class Category(PubCreatModel):
         return self.title[:AMT_SIGN_TITLE]
 
 
-class Location(PubCreatModel):
+class Location(PubCreatUpdModel):
     '''Модель Локаций.'''
 
     name = models.CharField(
@@ -61,10 +78,48 @@ class Location(PubCreatModel):
         return self.name[:AMT_SIGN_TITLE]
 
 
+class PostQuerySet(models.QuerySet):
+    '''QuerySet постов.'''
+
+    def published(self):
+        '''Посты, видимые всем посетителям.'''
+        return self.filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now()
+        )
+
+    def visible_to(self, user):
+        '''Опубликованные посты и все посты самого пользователя.'''
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(
+            models.Q(author=user)
+            | models.Q(
+                is_published=True,
+                category__is_published=True,
+                pub_date__lte=timezone.now()
+            )
+        )
+
+    def recount_comments(self):
+        '''Пересчитывает денормализованный счётчик комментариев.'''
+        comments = (
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return self.update(
+            comment_count=Coalesce(Subquery(comments), 0)
+        )
+
+
 @admin.display(
     description='Фото'
 )
-class Post(PubCreatModel):
+class Post(PubCreatUpdModel):
     '''Модель поста.'''
 
     title = models.CharField('Заголовок', max_length=256)
@@ -79,6 +134,7 @@ class Post(PubCreatModel):
         verbose_name='Автор публикации',
         on_delete=models.CASCADE,
         related_name='posts',
+        db_index=False,
     )
     location = models.ForeignKey(
         Location,
@@ -93,18 +149,54 @@ class Post(PubCreatModel):
         null=True,
         verbose_name='Категория',
         related_name='posts',
+        db_index=False,
     )
     image = models.ImageField('Фото', upload_to='images', blank=True)
+    thumbnail_format = models.CharField(
+        'Формат миниатюр',
+        max_length=8,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Пусто, пока миниатюры текущего изображения не готовы.',
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def image_tag(self):
+        if not self.image:
+            return ''
         return mark_safe(
-            '<img src="/%s" width="150" height="150" />' % (self.image)
+            '<img src="%s" width="150" height="150" />'
+            % escape(thumbnail_url(self.image, 'admin'))
         )
 
+    image_tag.short_description = 'Изображение'
+
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='post_feed_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=('category', 'pub_date', 'id'),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_feed_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title[:AMT_SIGN_TITLE]
@@ -120,7 +212,8 @@ class Comment(PubCreatModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_index=False,
     )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE,
@@ -136,6 +229,56 @@ class Comment(PubCreatModel):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ("created_at",)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:AMT_SIGN_TITLE]
+
+
+class ImageJob(models.Model):
+    '''Задача фоновой обработки изображения поста.'''
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Обрабатывается'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Публикация',
+    )
+    image = models.CharField('Файл', max_length=256)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='imagejob_status_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.image} ({self.get_status_display()})'
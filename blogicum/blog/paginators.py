@@ -0,0 +1,174 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from . import caching
+from .scheduler import schedule
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('created_at', 'id')
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def pack_cursor(data):
+    '''Упаковывает данные курсора в непрозрачный токен для URL.'''
+    payload = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def unpack_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, TypeError, ValueError) as error:
+        raise InvalidCursor('Некорректный курсор.') from error
+
+
+class CachedCountPaginator(Paginator):
+    '''Paginator, берущий число записей ленты из кэша.
+
+    Кэш поддерживают сигналы публикации постов и категорий;
+    при промахе выполняется точный COUNT(*).
+    '''
+
+    def __init__(self, object_list, per_page, feed_scope=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed_scope = feed_scope
+
+    @cached_property
+    def count(self):
+        if self.feed_scope is None:
+            return Paginator.count.func(self)
+        return caching.get_count(
+            self.feed_scope,
+            lambda: Paginator.count.func(self),
+            schedule.timeout(self.feed_scope),
+        )
+
+
+class CursorPage(Sequence):
+    '''Страница курсорной пагинации.'''
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page of %s items>' % len(self)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    '''Пагинация по ключу сортировки без OFFSET и COUNT(*).
+
+    Курсор — непрозрачный токен со значениями полей сортировки
+    первой или последней записи страницы.
+    '''
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            object_list.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, direction, obj):
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        return pack_cursor([direction, values])
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = unpack_cursor(cursor)
+            if direction not in (FORWARD, BACKWARD):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+            if None in values:
+                raise ValueError(values)
+            return direction, values
+        except (TypeError, ValueError, ValidationError) as error:
+            raise InvalidCursor('Некорректный курсор.') from error
+
+    def _seek(self, values, backward):
+        '''Условие «строго после курсора» для составного ключа.'''
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != backward
+            lookup = '%s__%s' % (field, 'lt' if descending else 'gt')
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def page(self, cursor=None):
+        direction, values = FORWARD, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        backward = direction == BACKWARD
+        ordering = self.ordering
+        if backward:
+            ordering = tuple(
+                name[1:] if name.startswith('-') else '-' + name
+                for name in ordering
+            )
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, backward))
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backward:
+            items.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        if not items:
+            return CursorPage(items)
+        return CursorPage(
+            items,
+            next_cursor=(
+                self.encode_cursor(FORWARD, items[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(BACKWARD, items[0])
+                if has_previous else None
+            ),
+        )
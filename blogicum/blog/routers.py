@@ -0,0 +1,94 @@
+'''Чтение публичных лент и постов с реплик.
+
+Реплики — алиасы BLOG_READ_REPLICAS из DATABASES. С них читают только
+запросы, которым это разрешил ReplicaMiddleware: безопасный метод,
+представление с replica_reads = True и пользователь, который не писал
+последние BLOG_REPLICA_PIN_SECONDS секунд. Пишут всегда в default, и
+после первой записи до конца запроса читают тоже из default. Записью
+считается выполненный INSERT, UPDATE или DELETE, а не выбор базы.
+Пользователи и сессии всегда читаются из default, а промахи общих
+кэшей — сразу после их сброса: см. caching.read_for_cache().
+'''
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'blog_primary'
+PRIMARY_APPS = frozenset({'auth', 'sessions'})
+WRITE_STATEMENTS = frozenset({'INSERT', 'UPDATE', 'DELETE', 'REPLACE'})
+
+_routing = ContextVar('blog_db_routing', default=None)
+
+
+class Routing:
+    '''Куда читает текущий запрос и писал ли он уже.'''
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+@contextmanager
+def routing():
+    state = Routing()
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def use_replica():
+    '''Переводит чтение текущего запроса на случайную реплику.'''
+    state = _routing.get()
+    if state is not None and settings.BLOG_READ_REPLICAS:
+        state.replica = random.choice(settings.BLOG_READ_REPLICAS)
+
+
+def use_primary():
+    '''Возвращает чтение текущего запроса на основную базу.
+
+    Нужно перед чтением, результат которого ляжет в общий кэш, пока
+    реплика может не видеть записи, из-за которой кэш сброшен.
+    '''
+    state = _routing.get()
+    if state is not None:
+        state.replica = None
+
+
+def track_writes(execute, sql, params, many, context):
+    '''Обёртка запросов основной базы: отмечает запрос, который писал.'''
+    state = _routing.get()
+    if state is not None and not state.wrote:
+        words = sql.lstrip()[:8].split(None, 1)
+        state.wrote = bool(words) and words[0].upper() in WRITE_STATEMENTS
+    return execute(sql, params, many, context)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        state = _routing.get()
+        if state is None or state.wrote:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.BLOG_READ_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        '''Схема приходит на реплики вместе с данными.'''
+        if db in settings.BLOG_READ_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,73 @@
+import math
+
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from . import caching
+from .models import Post
+
+NO_PENDING = 'none'
+
+FEED_FILTERS = {
+    'index': lambda value: Q(),
+    'category': lambda value: Q(category__slug=value),
+    'author': lambda value: Q(author__username=value),
+}
+
+
+def feed_filter(scope):
+    '''Условие отбора постов ленты по её ключу вида «category:slug».'''
+    kind, _, value = scope.partition(':')
+    return FEED_FILTERS[kind](value)
+
+
+class PublicationSchedule:
+    '''Расписание отложенных публикаций по лентам.
+
+    Для каждой ленты хранит момент ближайшей отложенной публикации,
+    чтобы кэш ленты истёк ровно тогда, когда пост должен появиться.
+    '''
+
+    def key(self, scope):
+        return f'blog:feed:due:{caching.feed_version()}:{scope}'
+
+    def pending(self, scope):
+        return Post.objects.filter(
+            feed_filter(scope),
+            is_published=True,
+            category__is_published=True,
+            pub_date__gt=timezone.now(),
+        )
+
+    def next_due(self, scope):
+        '''Время ближайшей отложенной публикации ленты или None.'''
+        cache = caching.get_cache()
+        key = self.key(scope)
+        due = cache.get(key)
+        if due is None:
+            caching.read_for_cache()
+            due = self.pending(scope).aggregate(
+                next_pub_date=Min('pub_date')
+            )['next_pub_date'] or NO_PENDING
+            cache.set(key, due, self._seconds_until(due))
+        if due == NO_PENDING:
+            return None
+        return due
+
+    def timeout(self, scope, default=None):
+        '''Время жизни кэша ленты с учётом ближайшей публикации.'''
+        if default is None:
+            default = settings.BLOG_FEED_CACHE_TIMEOUT
+        due = self.next_due(scope)
+        if due is None:
+            return default
+        return min(default, self._seconds_until(due))
+
+    def _seconds_until(self, due):
+        if due == NO_PENDING:
+            return settings.BLOG_FEED_CACHE_TIMEOUT
+        return max(0, math.floor((due - timezone.now()).total_seconds()))
+
+
+schedule = PublicationSchedule()
@@ -0,0 +1,177 @@
+import json
+import re
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .inverted_index import search_index
+from .paginators import (
+    CursorPage, CursorPaginator, InvalidCursor, pack_cursor, unpack_cursor,
+)
+
+FTS_TABLE = 'blog_post_fts'
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+FTS_SCHEMA = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "title, text, content='blog_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        'AFTER INSERT ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+        'VALUES (new.id, new.title, new.text); END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        'AFTER DELETE ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) '
+        "VALUES ('delete', old.id, old.title, old.text); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        'AFTER UPDATE OF title, text ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) '
+        "VALUES ('delete', old.id, old.title, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+        'VALUES (new.id, new.title, new.text); END'
+    ),
+}
+# Алиас базы → есть ли в ней индекс FTS5, см. fts_available().
+_fts_tables = {}
+
+
+def install_fts(connection):
+    '''Создаёт индекс FTS5 и триггеры синхронизации с blog_post.
+
+    SQLite теряет триггеры, когда миграции пересоздают таблицу
+    blog_post, поэтому функция идемпотентна и вызывается после каждой
+    миграции; при восстановлении триггеров индекс перестраивается.
+    Возвращает False, если база не SQLite или собрана без FTS5.
+    '''
+    _fts_tables.pop(connection.alias, None)
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(FTS_SCHEMA)
+        except OperationalError:
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s',
+            ['blog_post'],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = set(FTS_TRIGGERS) - existing
+        for name in sorted(missing):
+            cursor.execute(f'CREATE TRIGGER {name} {FTS_TRIGGERS[name]}')
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+    return True
+
+
+def uninstall_fts(connection):
+    _fts_tables.pop(connection.alias, None)
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def fts_available(using='default'):
+    '''Есть ли индекс FTS5 в базе; ответ запоминается для алиаса.
+
+    Индекс создают и удаляют только install_fts() и uninstall_fts(),
+    они же сбрасывают запомненный ответ.
+    '''
+    if using not in _fts_tables:
+        connection = connections[using]
+        _fts_tables[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[using]
+
+
+def fts_query(text):
+    '''Запрос MATCH из слов строки: каждое слово — префикс, все — через И.'''
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text.lower()))
+
+
+def fts_match(text):
+    '''Выражение для фильтра pk__in по совпадениям в индексе.'''
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (fts_query(text),),
+    )
+
+
+def id_list(ids, connection):
+    '''Выражение для фильтра pk__in со списком id любой длины.
+
+    В SQLite список уходит одним параметром через json_each: число
+    параметров запроса ограничено, а совпадений в индексе может быть
+    сколько угодно.
+    '''
+    if connection.vendor != 'sqlite':
+        return ids
+    return RawSQL('SELECT value FROM json_each(%s)', (json.dumps(ids),))
+
+
+def search_posts(text, queryset, cursor=None, per_page=10):
+    '''Страница постов из queryset, найденных по тексту.
+
+    С FTS5 посты ранжируются по BM25 (заголовок весомее текста),
+    курсор хранит ранг и id последнего поста. Без FTS5 — поиск
+    по инвертированному индексу со стеммингом или по подстроке
+    (BLOG_SEARCH_FALLBACK) с сортировкой по дате публикации.
+    '''
+    if not fts_query(text):
+        return CursorPage([])
+    if not fts_available(queryset.db):
+        if settings.BLOG_SEARCH_FALLBACK == 'index':
+            matches = Q(pk__in=id_list(
+                search_index.search(text), connections[queryset.db]
+            ))
+        else:
+            matches = Q(title__icontains=text) | Q(text__icontains=text)
+        return CursorPaginator(queryset.filter(matches), per_page).page(cursor)
+    seek, seek_params = '', []
+    if cursor:
+        try:
+            score, last_id = unpack_cursor(cursor)
+            seek_params = [float(score), float(score), int(last_id)]
+        except (TypeError, ValueError) as error:
+            raise InvalidCursor('Некорректный курсор.') from error
+        seek = 'AND (score > %s OR (score = %s AND rowid > %s))'
+    visible_sql, visible_params = (
+        queryset.order_by().values('pk').query.sql_with_params()
+    )
+    sql = (
+        'SELECT rowid, score FROM ('
+        f'SELECT rowid, bm25({FTS_TABLE}, %s, %s) AS score '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        f') WHERE rowid IN ({visible_sql}) {seek} '
+        'ORDER BY score, rowid LIMIT %s'
+    )
+    params = [
+        TITLE_WEIGHT, TEXT_WEIGHT, fts_query(text),
+        *visible_params, *seek_params, per_page + 1,
+    ]
+    with connections[queryset.db].cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        ranked = db_cursor.fetchall()
+    posts = queryset.in_bulk([post_id for post_id, _ in ranked[:per_page]])
+    items = [posts[post_id] for post_id, _ in ranked[:per_page]]
+    next_cursor = None
+    if len(ranked) > per_page:
+        post_id, score = ranked[per_page - 1]
+        next_cursor = pack_cursor([score, post_id])
+    return CursorPage(items, next_cursor=next_cursor)
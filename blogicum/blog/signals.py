@@ -0,0 +1,191 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import caching
+from .inverted_index import search_index
+from .models import Category, Comment, Location, Post, User
+
+# Массовое изменение записей одним UPDATE, без сигналов по строкам.
+bulk_updated = Signal()
+
+
+def invalidate_feeds_on_commit():
+    '''Сбрасывает кэш лент после фиксации текущей транзакции.
+
+    До фиксации параллельный запрос видит старые данные и положил бы
+    их в кэш под новым поколением. Внутри транзакции кэш сбрасывается
+    ещё и сразу, чтобы её собственные чтения не брали старые страницы.
+    '''
+    if transaction.get_connection().in_atomic_block:
+        caching.invalidate_feeds()
+    transaction.on_commit(caching.invalidate_feeds)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw=False, **kwargs):
+    '''Запоминает пост, к которому комментарий был привязан до сохранения.'''
+    instance._previous_post_id = None
+    if not raw and instance.pk is not None:
+        instance._previous_post_id = (
+            Comment.objects.filter(pk=instance.pk)
+            .values_list('post_id', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, raw=False, **kwargs):
+    '''Увеличивает счётчик комментариев поста.'''
+    if raw:
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created or previous_post_id is None:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1, updated_at=timezone.now()
+        )
+    else:
+        # Правка комментария меняет и страницу его поста.
+        posts = Post.objects.filter(
+            pk__in={previous_post_id, instance.post_id}
+        )
+        if previous_post_id != instance.post_id:
+            posts.recount_comments()
+        posts.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    '''Уменьшает счётчик комментариев поста.'''
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=User)
+def invalidate_feed_cache(sender, **kwargs):
+    '''Сбрасывает кэш лент при изменении отображаемых в них данных.'''
+    invalidate_feeds_on_commit()
+
+
+@receiver(post_save, sender=User)
+def invalidate_feed_cache_on_user_change(
+    sender, update_fields=None, **kwargs
+):
+    '''Сбрасывает кэш лент, кроме сохранения одного только last_login.'''
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_feeds_on_commit()
+
+
+def published_feeds(row):
+    '''Ленты, в которых пост сейчас виден всем посетителям.'''
+    if not (
+        row['is_published']
+        and row['category__is_published']
+        and row['pub_date'] <= timezone.now()
+    ):
+        return set()
+    return {
+        'index',
+        f'category:{row["category__slug"]}',
+        f'author:{row["author__username"]}',
+    }
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw=False, **kwargs):
+    '''Запоминает ленты, в которых пост был виден до сохранения.'''
+    instance._previous_feeds = set()
+    if raw or instance.pk is None:
+        return
+    row = Post.objects.filter(pk=instance.pk).values(
+        'is_published',
+        'pub_date',
+        'category__is_published',
+        'category__slug',
+        'author__username',
+    ).first()
+    if row is not None:
+        instance._previous_feeds = published_feeds(row)
+
+
+@receiver(post_save, sender=Post)
+def update_feed_counts(sender, instance, raw=False, **kwargs):
+    '''Поправляет закэшированное число постов затронутых лент.'''
+    if raw:
+        caching.invalidate_counts()
+        return
+    category = instance.category
+    current = published_feeds({
+        'is_published': instance.is_published,
+        'pub_date': instance.pub_date,
+        'category__is_published': category is not None
+        and category.is_published,
+        'category__slug': category.slug if category else None,
+        'author__username': instance.author.username,
+    })
+    previous = getattr(instance, '_previous_feeds', set())
+    deltas = [(scope, 1) for scope in current - previous]
+    deltas += [(scope, -1) for scope in previous - current]
+    if deltas:
+        # Откаченное сохранение не должно сдвигать числа в кэше.
+        transaction.on_commit(
+            lambda: [caching.adjust_count(*delta) for delta in deltas]
+        )
+
+
+@receiver(post_save, sender=Category)
+def invalidate_counts_on_category_change(sender, created, **kwargs):
+    '''Сбрасывает числа постов лент при изменении категории.'''
+    if not created:
+        caching.invalidate_counts()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=User)
+def invalidate_counts_on_delete(sender, **kwargs):
+    '''Сбрасывает числа постов лент при удалении постов.'''
+    caching.invalidate_counts()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reindex_post(sender, instance, raw=False, **kwargs):
+    '''Обновляет пост в инвертированном индексе поиска.'''
+    if not raw:
+        post_id = instance.pk
+        transaction.on_commit(lambda: search_index.update(post_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reindex_comment_post(sender, instance, raw=False, **kwargs):
+    '''Обновляет в индексе пост комментария и пост, откуда он перенесён.'''
+    if raw:
+        return
+    post_ids = {instance.post_id, getattr(instance, '_previous_post_id', None)}
+    post_ids.discard(None)
+    transaction.on_commit(
+        lambda: [search_index.update(post_id) for post_id in post_ids]
+    )
+
+
+@receiver(bulk_updated)
+def invalidate_after_bulk_update(sender, **kwargs):
+    '''Один сброс кэшей лент на всё массовое изменение.'''
+    caching.invalidate_feeds()
+    caching.invalidate_counts()
@@ -0,0 +1,133 @@
+'''Стеммер Snowball для русского языка.
+
+Реализация алгоритма
+https://snowballstem.org/algorithms/russian/stemmer.html
+без внешних зависимостей.
+'''
+from functools import lru_cache
+
+VOWELS = frozenset('аеиоуыэюя')
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую',
+        'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ((), ('ейше', 'ейш'))
+DERIVATIONAL = ((), ('ость', 'ост'))
+
+
+def _regions(word):
+    '''Начала областей RV и R2.'''
+    rv = r1 = r2 = len(word)
+    for i, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(region, groups):
+    '''Отрезает от области самое длинное подходящее окончание.
+
+    Окончания первой группы допускаются только после «а» или «я».
+    Возвращает укороченную область или None, если ничего не найдено.
+    '''
+    best = None
+    for group, endings in enumerate(groups):
+        for ending in endings:
+            if not region.endswith(ending):
+                continue
+            if group == 0 and region[-len(ending) - 1:-len(ending)] not in (
+                'а', 'я'
+            ):
+                continue
+            if best is None or len(ending) > len(best):
+                best = ending
+    if best is None:
+        return None
+    return region[:-len(best)]
+
+
+def _step1(rv):
+    stripped = _strip(rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        return stripped
+    stripped = _strip(rv, REFLEXIVE)
+    if stripped is not None:
+        rv = stripped
+    stripped = _strip(rv, ADJECTIVE)
+    if stripped is not None:
+        participle = _strip(stripped, PARTICIPLE)
+        return stripped if participle is None else participle
+    for groups in (VERB, NOUN):
+        stripped = _strip(rv, groups)
+        if stripped is not None:
+            return stripped
+    return rv
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    '''Основа русского слова в нижнем регистре.'''
+    word = word.lower().replace('ё', 'е')
+    rv_start, r2_start = _regions(word)
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _step1(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    r2 = (prefix + rv)[r2_start:]
+    stripped = _strip(r2, DERIVATIONAL)
+    if stripped is not None:
+        rv = rv[:len(rv) - (len(r2) - len(stripped))]
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    else:
+        stripped = _strip(rv, SUPERLATIVE)
+        if stripped is not None:
+            rv = stripped
+            if rv.endswith('нн'):
+                rv = rv[:-1]
+        elif rv.endswith('ь'):
+            rv = rv[:-1]
+    return prefix + rv
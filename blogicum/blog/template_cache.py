@@ -0,0 +1,77 @@
+'''Разбор всех шаблонов заранее: проверка при деплое и прогрев кэша.
+
+С cached.Loader шаблон разбирается один раз на процесс, при первом
+get_template. compile_templates разбирает все файлы шаблонов, а у
+шаблонов проекта ещё проверяет, что шаблоны из {% extends %} и
+{% include %} с постоянным именем существуют. Вызванный при старте
+воркера, он заодно заполняет кэш загрузчика, и первые запросы не
+платят за разбор.
+'''
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+logger = logging.getLogger(__name__)
+
+SUFFIXES = ('.html', '.txt')
+
+
+def template_names(directories):
+    '''Имена всех шаблонов в каталогах.'''
+    return {
+        path.relative_to(directory).as_posix()
+        for directory in map(Path, directories)
+        for path in directory.rglob('*')
+        if path.suffix in SUFFIXES and path.is_file()
+    }
+
+
+def referenced_names(template):
+    '''Постоянные имена шаблонов из {% extends %} и {% include %}.'''
+    nodes = template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode))
+    for node in nodes:
+        expression = (
+            node.parent_name if isinstance(node, ExtendsNode)
+            else node.template
+        )
+        if isinstance(expression.var, str):
+            yield expression.var
+
+
+def compile_templates(engine=None):
+    '''Разбирает все шаблоны; возвращает их число и ошибки по именам.'''
+    if engine is None:
+        engine = engines['django'].engine
+    names = template_names(
+        directory
+        for loader in engine.template_loaders
+        for directory in loader.get_dirs()
+    )
+    # Ссылки проверяются только у шаблонов проекта: виджеты приложений
+    # ссылаются на шаблоны рендерера форм, которых у движка нет.
+    own = template_names(engine.dirs)
+    errors = {}
+    for name in sorted(names):
+        try:
+            template = engine.get_template(name)
+        except TemplateSyntaxError as error:
+            errors[name] = str(error)
+            continue
+        if name not in own:
+            continue
+        missing = sorted(set(referenced_names(template)) - names)
+        if missing:
+            errors[name] = f'нет шаблонов: {", ".join(missing)}'
+    return len(names), errors
+
+
+def warm_up():
+    '''Прогрев кэша шаблонов при старте воркера; ошибки только в лог.'''
+    if not settings.BLOG_TEMPLATE_CACHE:
+        return
+    _, errors = compile_templates()
+    for name, error in sorted(errors.items()):
+        logger.error('Шаблон %s: %s', name, error)
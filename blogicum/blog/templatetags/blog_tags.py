@@ -0,0 +1,44 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.caching import card_key, get_fragment
+from blog.thumbnails import thumbnail_url
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+@register.filter
+def thumbnail(image, size):
+    '''URL миниатюры изображения поста: {{ post.image|thumbnail:'card' }}.'''
+    return thumbnail_url(image, size)
+
+
+@register.simple_tag(takes_context=True)
+def query_string(context, **kwargs):
+    '''Строка запроса текущей страницы с заменёнными параметрами.
+
+    Параметр со значением None удаляется: {% query_string cursor=None %}.
+    '''
+    query = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return '?' + query.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    '''Карточка поста через кэш фрагментов: {% post_card post %}.'''
+    def render():
+        # Как {% include %}: шаблон загружается один раз за рендеринг.
+        card = context.render_context.get(CARD_TEMPLATE)
+        if card is None:
+            card = context.template.engine.get_template(CARD_TEMPLATE)
+            context.render_context[CARD_TEMPLATE] = card
+        return card.render(context.new({'post': post}))
+
+    return mark_safe(get_fragment('post_card', card_key(post), render))
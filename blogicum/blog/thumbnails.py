@@ -0,0 +1,100 @@
+import os
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+THUMBNAIL_SIZES = {
+    'card': (640, 480, False),
+    'detail': (1280, 960, False),
+    'admin': (150, 150, True),
+}
+THUMBNAIL_EXTENSIONS = {
+    'WEBP': '.webp',
+    'JPEG': '.jpg',
+}
+THUMBNAIL_QUALITY = 85
+
+
+def thumbnail_format():
+    '''Формат миниатюр из настроек; JPEG, если Pillow собран без WebP.'''
+    image_format = settings.BLOG_THUMBNAIL_FORMAT
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def thumbnail_name(name, size, image_format=None):
+    '''Имя миниатюры рядом с оригиналом: cat.png → cat_card.webp.'''
+    extension = THUMBNAIL_EXTENSIONS[image_format or thumbnail_format()]
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}_{size}{extension}'))
+
+
+def thumbnail_url(image, size):
+    '''URL миниатюры, а пока её нет — URL оригинала.
+
+    Формат готовых миниатюр записан в посте, поэтому хранилище не
+    опрашивается, а смена BLOG_THUMBNAIL_FORMAT не теряет старые файлы.
+    '''
+    if not image:
+        return ''
+    image_format = getattr(image.instance, 'thumbnail_format', '')
+    if image_format in THUMBNAIL_EXTENSIONS:
+        return image.storage.url(
+            thumbnail_name(image.name, size, image_format)
+        )
+    return image.url
+
+
+def render_thumbnail(source, size):
+    width, height, crop = THUMBNAIL_SIZES[size]
+    if crop:
+        image = ImageOps.fit(
+            source, (width, height), Image.Resampling.LANCZOS
+        )
+    else:
+        image = source.copy()
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def build_thumbnails(source_path, image_format, force=True):
+    '''Декодирует оригинал, поворачивает по EXIF и пишет миниатюры.
+
+    Не обращается к Django, поэтому выполняется в отдельном процессе.
+    Файлы пишутся через временное имя, чтобы страница не получила
+    недописанную миниатюру. Возвращает пути созданных файлов.
+    '''
+    source_path = Path(source_path)
+    targets = {
+        size: source_path.with_name(
+            thumbnail_name(source_path.name, size, image_format)
+        )
+        for size in THUMBNAIL_SIZES
+    }
+    if not force:
+        targets = {
+            size: path for size, path in targets.items() if not path.exists()
+        }
+    if not targets:
+        return []
+    with Image.open(source_path) as source:
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    created = []
+    for size, path in targets.items():
+        temporary = path.with_name(f'.{path.name}.tmp')
+        render_thumbnail(source, size).save(
+            temporary, image_format, quality=THUMBNAIL_QUALITY, optimize=True
+        )
+        os.replace(temporary, path)
+        created.append(str(path))
+    return created
+
+
+def generate_thumbnails(image, force=True):
+    '''Создаёт миниатюры всех размеров для файла из ImageField.'''
+    return build_thumbnails(image.path, thumbnail_format(), force)
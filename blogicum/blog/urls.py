@@ -35,6 +35,11 @@ posts_urls = [
         views.CommentDeleteView.as_view(),
         name='delete_comment'
     ),
+    path(
+        '<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='post_comments'
+    ),
     path(
         '<int:post_id>/',
         views.PostDetailView.as_view(),
@@ -53,6 +58,8 @@ urlpatterns = [
         views.CategoryPostsListView.as_view(),
         name='category_posts'
     ),
+    path('search/', views.PostSearchView.as_view(), name='search'),
+    path('export/<slug:kind>/', views.ExportView.as_view(), name='export'),
     path(
         'edit_profile/',
         views.ProfileUpdateView.as_view(),
@@ -1,53 +1,108 @@
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
+from django.core.paginator import InvalidPage
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
-                                  UpdateView)
+                                  UpdateView, View)
 
+from .export import (EXPORTS, FORMATS, export_rows, iter_export,
+                     parse_overlap, parse_since)
 from .forms import CommentForm, PostForm, ProfileForm
-from .mixins import BaseFormMixin, CommentMixin, PostMixin
+from .mixins import (BaseFormMixin, CommentMixin, CommentPageMixin,
+                     ConditionalGetMixin, FeedCacheMixin, PostMixin)
 from .models import Category, Post, User
+from .search import search_posts
 
 
-class PostListView(BaseFormMixin, ListView):
+class PostListView(
+    ConditionalGetMixin, FeedCacheMixin, BaseFormMixin, ListView
+):
     '''Главная страница со всеми постами.'''
 
-    pass
+    replica_reads = True
+
+
+class PostSearchView(BaseFormMixin, ListView):
+    '''Поиск по опубликованным постам с ранжированием по релевантности.'''
+
+    template_name = 'blog/search.html'
+    feed_scope = None
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = search_posts(
+                self.get_search_query(),
+                queryset,
+                cursor=self.request.GET.get('cursor'),
+                per_page=page_size,
+            )
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.get_search_query()
+        return context
 
 
-class PostDetailView(LoginRequiredMixin, DetailView):
+class PostDetailView(
+    LoginRequiredMixin, ConditionalGetMixin, CommentPageMixin, DetailView
+):
     '''Страница определенного поста.'''
 
+    replica_reads = True
+
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
 
     def get_object(self):
-        data = (
-            Post.objects.select_related('author', 'category', 'location')
-            .filter(
-                Q(author=self.request.user)
-                | Q(
-                    is_published=True,
-                    category__is_published=True,
-                    pub_date__lte=timezone.now()
-                )
-            )
-        )
-        return get_object_or_404(
-            data,
-            pk=self.kwargs.get('post_id'),
-        )
+        return self.get_post()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = self.get_comments_page(self.object)
         return context
 
 
+class CommentListView(LoginRequiredMixin, CommentPageMixin, View):
+    '''Следующая страница комментариев поста: HTML-фрагмент или JSON.'''
+
+    template_name = 'includes/comment_list.html'
+
+    def get(self, request, *args, **kwargs):
+        post = self.get_post()
+        comments = self.get_comments_page(post)
+        html = render_to_string(
+            self.template_name,
+            {'post': post, 'comments': comments},
+            request=request,
+        )
+        if request.GET.get('format') != 'json':
+            return HttpResponse(html)
+        return JsonResponse({
+            'html': html,
+            'next_cursor': comments.next_cursor,
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_at': comment.created_at,
+                }
+                for comment in comments
+            ],
+        })
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     '''Создание поста.'''
 
@@ -86,22 +141,30 @@ class PostDeleteView(
         return context
 
 
-class CategoryPostsListView(BaseFormMixin, ListView):
+class CategoryPostsListView(
+    ConditionalGetMixin, FeedCacheMixin, BaseFormMixin, ListView
+):
     '''Страница с постами определенной категории.'''
 
+    replica_reads = True
+
     template_name = 'blog/category.html'
 
+    def get_feed_scope(self):
+        return f'category:{self.kwargs["category_slug"]}'
+
+    def get_feed_queryset(self):
+        return super().get_queryset().filter(
+            category__slug=self.kwargs['category_slug']
+        )
+
     def get_queryset(self):
         self.category = get_object_or_404(
             Category,
             slug=self.kwargs['category_slug'],
             is_published=True,
         )
-        return (
-            super().get_queryset().filter(
-                category__slug=self.kwargs['category_slug']
-            )
-        )
+        return self.get_feed_queryset()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -134,25 +197,34 @@ class CommentDeleteView(
     pass
 
 
-class ProfileListView(BaseFormMixin, ListView):
+class ProfileListView(
+    ConditionalGetMixin, FeedCacheMixin, BaseFormMixin, ListView
+):
     '''Страница профиля.'''
 
+    replica_reads = True
+
     template_name = 'blog/profile.html'
 
+    def get_feed_scope(self):
+        if self.request.user.get_username() == self.kwargs['username']:
+            return None
+        return f'author:{self.kwargs["username"]}'
+
+    def get_feed_queryset(self):
+        '''Владелец профиля видит и свои неопубликованные посты.'''
+        if self.request.user.get_username() == self.kwargs['username']:
+            queryset = self.get_queryset_comment()
+        else:
+            queryset = super().get_queryset()
+        return queryset.filter(author__username=self.kwargs['username'])
+
     def get_queryset(self):
         self.get_username = get_object_or_404(
             User,
             username=self.kwargs['username']
         )
-        if self.request.user == self.get_username:
-            return (
-                self.get_queryset_comment()
-                .filter(author__username=self.kwargs['username'])
-            )
-        return (
-            super().get_queryset()
-            .filter(author__username=self.kwargs['username'])
-        )
+        return self.get_feed_queryset()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -172,3 +244,37 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
 
     def get_success_url(self):
         return reverse('blog:index')
+
+
+class ExportView(UserPassesTestMixin, View):
+    '''Потоковая выгрузка постов или комментариев для сотрудников.
+
+    Параметры: format=jsonl|csv, since — водяная метка
+    «<ISO-время>,<id>», overlap — окно перекрытия в секундах.
+    '''
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise Http404('Неизвестная выгрузка.')
+        export_format = request.GET.get('format', 'jsonl')
+        if export_format not in FORMATS:
+            return HttpResponseBadRequest('Неизвестный формат.')
+        try:
+            rows = export_rows(
+                kind,
+                since=parse_since(request.GET.get('since')),
+                overlap=parse_overlap(request.GET.get('overlap')),
+            )
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        response = StreamingHttpResponse(
+            iter_export(kind, export_format, rows),
+            content_type=FORMATS[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{export_format}"'
+        )
+        return response
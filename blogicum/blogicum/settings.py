@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.RequestMetricsMiddleware',
+    'blog.middleware.TransactionModeMiddleware',
+    'blog.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -42,12 +46,29 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Разобранные шаблоны хранятся в памяти процесса; по умолчанию — когда
+# DEBUG выключен. Кэш прогревает wsgi.py, проверяет manage.py
+# compile_templates.
+BLOG_TEMPLATE_CACHE = os.environ.get(
+    'BLOG_TEMPLATE_CACHE', '0' if DEBUG else '1'
+) == '1'
+
+if BLOG_TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -62,11 +83,61 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # Профиль PRAGMA: blog.backends.sqlite3.base.PRAGMAS, его можно
+        # переопределить в OPTIONS['pragmas'].
+        'ENGINE': 'blog.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'pragmas': {},
+        },
+        # Соединение живёт между запросами воркера; 0 — закрывать
+        # после каждого запроса.
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики для чтения лент: пути к файлам SQLite в BLOG_REPLICAS через
+# os.pathsep. Локально их заполняет manage.py sync_replicas.
+BLOG_READ_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('BLOG_REPLICAS', '').split(os.pathsep)), 1
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    BLOG_READ_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы,
+# а промахи кэша лент после его сброса — тоже с неё.
+BLOG_REPLICA_PIN_SECONDS = 10
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feeds': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-feeds',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-fragments',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': (
@@ -123,3 +194,67 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Курсорная пагинация лент вместо ?page=N: без OFFSET и COUNT(*).
+BLOG_CURSOR_PAGINATION = False
+
+# Кэш страниц лент: алиас из CACHES (LocMemCache вытесняет по LRU).
+BLOG_FEED_CACHE_ALIAS = 'feeds'
+
+BLOG_FEED_CACHE_TIMEOUT = 300
+
+# Кэш карточек постов: ключ зависит от содержимого карточки, поэтому
+# время жизни только ограничивает память под старые версии.
+BLOG_FRAGMENT_CACHE_ALIAS = 'fragments'
+
+BLOG_FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Миниатюры изображений постов и фоновая обработка загрузок.
+BLOG_THUMBNAIL_FORMAT = 'WEBP'
+
+# 0 — обрабатывать изображения синхронно, без пула процессов.
+BLOG_IMAGE_WORKERS = 2
+
+BLOG_IMAGE_MAX_PENDING = 8
+
+BLOG_IMAGE_MAX_ATTEMPTS = 3
+
+# Поиск без FTS5: 'index' — инвертированный индекс со стеммингом,
+# 'like' — поиск подстроки.
+BLOG_SEARCH_FALLBACK = 'index'
+
+BLOG_SEARCH_INDEX_PATH = BASE_DIR / 'search_index.bin'
+
+# Как часто индекс перечитывает снимок и догоняет записи других процессов.
+BLOG_SEARCH_INDEX_REFRESH_SECONDS = 30
+
+# Проверять постоянные соединения перед каждым запросом.
+BLOG_CONN_HEALTH_CHECKS = True
+
+# Метрики запросов: заголовок Server-Timing и лог blog.requests.
+BLOG_SERVER_TIMING = True
+
+# Пороги, сверх которых запрос пишется в лог как WARNING:
+# время в мс, число запросов к БД и повторов одного запроса (N+1).
+BLOG_REQUEST_THRESHOLDS = {
+    'default': {'total_ms': 500, 'queries': 20, 'duplicates': 5},
+    'blog:index': {'queries': 10},
+    'blog:category_posts': {'queries': 10},
+    'blog:profile': {'queries': 10},
+    'blog:post_detail': {'queries': 12},
+    'blog:export': {'total_ms': 60000},
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -41,6 +41,18 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches(tmp_path):
+    from django.core.cache import caches
+    from blog.inverted_index import search_index
+    for cache in caches.all():
+        cache.clear()
+    search_index.reset()
+    with override_settings(BLOG_SEARCH_INDEX_PATH=tmp_path / 'index.bin'):
+        yield
+    search_index.reset()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,6 +375,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog import caching
+
+pytestmark = [pytest.mark.django_db]
+
+
+def run_action(client, url, action, objects, **data):
+    return client.post(url, {
+        'action': action,
+        '_selected_action': [obj.pk for obj in objects],
+        **data,
+    })
+
+
+@pytest.mark.parametrize('model, url', [
+    ('blog.Post', '/admin/blog/post/'),
+    ('blog.Comment', '/admin/blog/comment/'),
+    ('blog.Category', '/admin/blog/category/'),
+    ('blog.Location', '/admin/blog/location/'),
+])
+def test_unpublish_and_publish_in_one_update(
+    admin_client, mixer: Mixer, django_capture_on_commit_callbacks,
+    model, url,
+):
+    objects = mixer.cycle(30).blend(model, is_published=True)
+    version = caching.feed_version()
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = run_action(admin_client, url, 'unpublish', objects)
+    assert response.status_code == 302
+    updates = [
+        query for query in queries if query['sql'].startswith('UPDATE')
+    ]
+    assert len(updates) == 1, (
+        'Убедитесь, что действие меняет записи одним UPDATE.'
+    )
+    model_class = objects[0]._meta.model
+    assert not model_class.objects.filter(is_published=True).exists()
+    assert caching.feed_version() == version + 1, (
+        'Убедитесь, что массовое действие сбрасывает кэш лент один раз.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        run_action(admin_client, url, 'publish', objects[:10])
+    assert model_class.objects.filter(is_published=True).count() == 10
+
+
+def test_move_posts_to_category(admin_client, mixer: Mixer, published_category):
+    posts = mixer.cycle(5).blend('blog.Post')
+    response = run_action(
+        admin_client, '/admin/blog/post/', 'move_to_category', posts[:3],
+        category=published_category.pk,
+    )
+    assert response.status_code == 302
+    moved = set(
+        published_category.posts.values_list('pk', flat=True)
+    )
+    assert moved == {post.pk for post in posts[:3]}
+
+
+def test_move_posts_requires_category(admin_client, mixer: Mixer):
+    posts = mixer.cycle(2).blend('blog.Post')
+    categories = {post.category_id for post in posts}
+    run_action(admin_client, '/admin/blog/post/', 'move_to_category', posts)
+    assert {
+        post.category_id for post in posts[0]._meta.model.objects.all()
+    } == categories
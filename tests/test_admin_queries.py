@@ -0,0 +1,39 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.parametrize('model, url', [
+    ('blog.Post', '/admin/blog/post/'),
+    ('blog.Comment', '/admin/blog/comment/'),
+])
+def test_changelist_queries_do_not_grow_with_rows(
+    admin_client, mixer: Mixer, model, url
+):
+    mixer.cycle(2).blend(model)
+    few = count_queries(admin_client, url)
+    mixer.cycle(20).blend(model)
+    assert count_queries(admin_client, url) == few, (
+        'Убедитесь, что число запросов списка в админке не зависит '
+        'от числа строк на странице.'
+    )
+
+
+def test_post_form_uses_autocomplete(admin_client, mixer: Mixer):
+    mixer.cycle(5).blend('blog.Location')
+    response = admin_client.get('/admin/blog/post/add/')
+    form = response.context['adminform'].form
+    for name in ('author', 'location', 'category'):
+        assert 'admin-autocomplete' in str(form[name]), (
+            f'Убедитесь, что поле {name} выбирается через автодополнение.'
+        )
@@ -0,0 +1,109 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from blog import caching
+from blog.bulk import iter_json_objects
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = Path(__file__).resolve().parent.parent / 'db.json'
+
+
+@pytest.mark.parametrize('text', [
+    '[{"a": 1}, {"a": [2, 3]}, {"a": "]"}]',
+    '  [\n{"a": 1},\n{"a": [2, 3]}\n,{"a": "]"}\n]\n',
+    '{"a": 1}\n{"a": [2, 3]}\n\n{"a": "]"}\n',
+])
+def test_iter_json_objects_streams_arrays_and_lines(text):
+    objects = list(iter_json_objects(StringIO(text), chunk_size=3))
+    assert objects == [{'a': 1}, {'a': [2, 3]}, {'a': ']'}]
+
+
+@pytest.mark.parametrize('text', ['[{"a": 1}', '[{"a": 1}] {}', '{"a": '])
+def test_iter_json_objects_rejects_broken_input(text):
+    with pytest.raises(ValueError):
+        list(iter_json_objects(StringIO(text), chunk_size=4))
+
+
+def test_iter_json_objects_stops_reading_malformed_input():
+    stream = StringIO('[{"a": ]' + ', {"b": 1}' * 10_000 + ']')
+    with pytest.raises(ValueError):
+        list(iter_json_objects(stream, chunk_size=16, max_object_size=64))
+    assert stream.tell() < 200, (
+        'Убедитесь, что после битого объекта поток не дочитывается '
+        'до конца в буфер.'
+    )
+
+
+def rows(user):
+    yield {'model': 'blog.category', 'pk': 1, 'fields': {
+        'title': 'Сад', 'description': 'Всё о саде', 'slug': 'garden',
+        'is_published': True, 'created_at': '2020-01-01T00:00:00Z',
+    }}
+    # Комментарии идут раньше постов: проверка внешних ключей отложена.
+    for pk in range(1, 6):
+        yield {'model': 'blog.comment', 'pk': pk, 'fields': {
+            'text': f'Комментарий {pk}', 'post': 1 + pk % 2,
+            'author': user.pk, 'is_published': True,
+            'created_at': '2020-01-02T00:00:00Z',
+        }}
+    for pk in (1, 2):
+        yield {'model': 'blog.post', 'pk': pk, 'fields': {
+            'title': f'Пост о тюльпанах {pk}', 'text': 'Текст',
+            'pub_date': '2020-01-01T00:00:00Z', 'author': user.pk,
+            'category': 1, 'is_published': True,
+            'created_at': '2020-01-01T00:00:00Z',
+        }}
+
+
+def test_bulk_loaddata_jsonl(
+    tmp_path, user, client, django_capture_on_commit_callbacks
+):
+    path = tmp_path / 'dump.jsonl'
+    path.write_text(
+        '\n'.join(json.dumps(row) for row in rows(user)), encoding='utf-8'
+    )
+    version = caching.feed_version()
+    out = StringIO()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command(
+            'bulk_loaddata', str(path), '--batch-size', '2', stdout=out
+        )
+    assert 'blog.Comment: 5' in out.getvalue()
+    assert 'строк/с' in out.getvalue()
+    assert Category.objects.get().created_at.year == 2020, (
+        'Убедитесь, что загрузка сохраняет даты из фикстуры.'
+    )
+    assert dict(Post.objects.values_list('pk', 'comment_count')) == {
+        1: 2, 2: 3,
+    }, 'Убедитесь, что после загрузки пересчитаны счётчики комментариев.'
+    assert caching.feed_version() > version
+    response = client.get('/search/', {'q': 'тюльпанах'})
+    assert len(response.context['page_obj']) == 2
+
+
+def test_bulk_loaddata_rolls_back_on_broken_foreign_key(tmp_path, user):
+    path = tmp_path / 'dump.json'
+    broken = list(rows(user))[:2]
+    broken[1]['fields']['post'] = 999
+    path.write_text(json.dumps(broken), encoding='utf-8')
+    with pytest.raises(CommandError):
+        call_command('bulk_loaddata', str(path), stdout=StringIO())
+    assert not Category.objects.exists()
+    assert not Comment.objects.exists()
+
+
+def test_bulk_loaddata_repo_fixture():
+    call_command(
+        'bulk_loaddata', str(FIXTURE), '--ignore-conflicts',
+        '--exclude', 'admin', '--exclude', 'sessions', stdout=StringIO(),
+    )
+    fixture = json.loads(FIXTURE.read_text(encoding='utf-8'))
+    assert Post.objects.count() == sum(
+        row['model'] == 'blog.post' for row in fixture
+    )
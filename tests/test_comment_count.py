@@ -0,0 +1,57 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Model
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_views(
+    user_client, post_with_published_location: Model
+):
+    post = post_with_published_location
+    for text in ('Первый', 'Второй'):
+        user_client.post(f'/posts/{post.id}/add_comment/', {'text': text})
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что счётчик комментариев поста увеличивается при '
+        'добавлении комментария.'
+    )
+    comment = post.comments.first()
+    user_client.post(f'/posts/{post.id}/delete_comment/{comment.id}/')
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        'Убедитесь, что счётчик комментариев поста уменьшается при '
+        'удалении комментария.'
+    )
+
+
+def test_comment_count_follows_bulk_delete_and_move(
+    mixer: Mixer, post_with_published_location: Model
+):
+    another_post = mixer.blend('blog.Post')
+    comments = mixer.cycle(3).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+    comments[0].post = another_post
+    comments[0].save()
+    post_with_published_location.refresh_from_db()
+    another_post.refresh_from_db()
+    assert post_with_published_location.comment_count == 2
+    assert another_post.comment_count == 1
+
+    post_with_published_location.comments.all().delete()
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 0
+
+
+def test_recount_comments_command(
+    mixer: Mixer, post_with_published_location: Model
+):
+    mixer.cycle(3).blend('blog.Comment', post=post_with_published_location)
+    type(post_with_published_location).objects.update(comment_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 3
@@ -0,0 +1,68 @@
+import re
+
+import pytest
+from mixer.backend.django import Mixer
+
+from blog.mixins import COUNT_OF_COMMENTS
+from blog.paginators import pack_cursor
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_comments(mixer: Mixer, post_with_published_location):
+    return mixer.cycle(COUNT_OF_COMMENTS + 5).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+
+
+def test_detail_page_shows_first_comments_page(
+    user_client, post_with_published_location, many_comments
+):
+    response = user_client.get(f'/posts/{post_with_published_location.id}/')
+    comments = list(response.context['comments'])
+    assert comments == many_comments[:COUNT_OF_COMMENTS], (
+        'Убедитесь, что на странице поста выводится только первая страница '
+        'комментариев в порядке добавления.'
+    )
+    assert 'data-more-comments' in response.content.decode()
+
+
+def test_comments_endpoint_returns_next_page(
+    user_client, post_with_published_location, many_comments
+):
+    post_id = post_with_published_location.id
+    content = user_client.get(f'/posts/{post_id}/').content.decode()
+    fragment_url = re.search(r'data-more-comments="([^"]+)"', content)
+    fragment = user_client.get(fragment_url.group(1).replace('&amp;', '&'))
+    assert fragment.status_code == 200
+    html = fragment.content.decode()
+    assert '<html' not in html
+    for comment in many_comments[COUNT_OF_COMMENTS:]:
+        assert f'name="comment_{comment.id}"' in html
+    assert 'data-more-comments' not in html
+
+    data = user_client.get(
+        fragment_url.group(1) + '&format=json'
+    ).json()
+    assert [item['id'] for item in data['comments']] == [
+        comment.id for comment in many_comments[COUNT_OF_COMMENTS:]
+    ]
+    assert data['next_cursor'] is None
+
+
+def test_comments_endpoint_respects_post_visibility(
+    user_client, unlogged_client, mixer: Mixer, another_user
+):
+    hidden = mixer.blend('blog.Post', author=another_user, is_published=False)
+    assert user_client.get(f'/posts/{hidden.id}/comments/').status_code == 404
+    response = unlogged_client.get(f'/posts/{hidden.id}/comments/')
+    assert response.status_code == 302
+
+
+@pytest.mark.parametrize('cursor', ('zzz', pack_cursor(['n', [None, None]])))
+def test_comments_endpoint_rejects_bad_cursor(
+    user_client, post_with_published_location, cursor
+):
+    url = f'/posts/{post_with_published_location.id}/comments/'
+    assert user_client.get(url, {'cursor': cursor}).status_code == 404
@@ -0,0 +1,160 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.admin import update_in_bulk
+from blog.models import Category, Post
+from blog.scheduler import schedule
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def visible_posts(many_posts_with_published_locations):
+    Post.objects.update(
+        is_published=True, pub_date=timezone.now() - timedelta(days=1)
+    )
+    return many_posts_with_published_locations
+
+
+def revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+def test_unchanged_feed_is_not_modified(client, visible_posts):
+    with CaptureQueriesContext(connection) as queries:
+        first = client.get('/')
+    assert not any(
+        'SUM(' in query['sql'] or 'MAX(' in query['sql'] for query in queries
+    ), 'Убедитесь, что ETag ленты не требует агрегата по всем её постам.'
+    assert first['ETag'].startswith('W/"')
+    assert not first.has_header('Last-Modified'), (
+        'Убедитесь, что лента не отдаёт Last-Modified: снятие поста '
+        'с публикации не сдвигает время изменения вперёд.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        second = revalidate(client, '/', first)
+    assert second.status_code == 304, (
+        'Убедитесь, что неизменившаяся лента отдаётся ответом 304.'
+    )
+    assert len(queries) == 0, (
+        'Убедитесь, что валидаторы ленты берутся из кэша лент.'
+    )
+
+
+def test_feed_changes_invalidate_validators(
+    client, mixer, visible_posts, django_capture_on_commit_callbacks
+):
+    post = Post.objects.published().order_by('-pub_date').first()
+    response = client.get('/')
+    changes = (
+        lambda: mixer.blend('blog.Comment', post=post),
+        lambda: update_in_bulk(
+            Category.objects.filter(pk=post.category_id), title='Новая'
+        ),
+        lambda: Post.objects.filter(pk=post.pk).delete(),
+    )
+    for change in changes:
+        with django_capture_on_commit_callbacks(execute=True):
+            change()
+        assert revalidate(client, '/', response).status_code == 200, (
+            'Убедитесь, что изменение видимых постов меняет ETag ленты.'
+        )
+        response = client.get('/')
+
+
+def test_scheduled_post_publication_changes_feed_etag(client, visible_posts):
+    post = visible_posts[0]
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() + timedelta(hours=1)
+    )
+    response = client.get('/')
+    assert revalidate(client, '/', response).status_code == 304
+    # Время публикации наступило: запись расписания ленты истекла.
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    caches['feeds'].delete(schedule.key('index'))
+    assert revalidate(client, '/', response).status_code == 200, (
+        'Убедитесь, что наступившая отложенная публикация меняет ETag ленты.'
+    )
+
+
+def test_if_modified_since_alone_does_not_skip_unpublishing(
+    client, visible_posts, django_capture_on_commit_callbacks
+):
+    client.get('/')
+    with django_capture_on_commit_callbacks(execute=True):
+        update_in_bulk(
+            Post.objects.filter(pk=visible_posts[0].pk), is_published=False
+        )
+    response = client.get(
+        '/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+    )
+    assert response.status_code == 200, (
+        'Убедитесь, что без ETag лента не отвечает 304 по одной дате.'
+    )
+
+
+def test_profile_validators_depend_on_viewer(
+    user, user_client, client, visible_posts,
+    django_capture_on_commit_callbacks,
+):
+    url = reverse('blog:profile', args=(user.username,))
+    own = user_client.get(url)
+    assert revalidate(client, url, own).status_code == 200, (
+        'Убедитесь, что ETag страницы зависит от пользователя.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        update_in_bulk(
+            Post.objects.filter(pk=visible_posts[0].pk), is_published=False
+        )
+    assert revalidate(user_client, url, own).status_code == 200, (
+        'Убедитесь, что владелец профиля видит снятые с публикации посты.'
+    )
+
+
+def test_new_comment_changes_post_detail(user_client, visible_posts):
+    post = visible_posts[0]
+    url = reverse('blog:post_detail', args=(post.pk,))
+    response = user_client.get(url)
+    assert revalidate(user_client, url, response).status_code == 304
+    user_client.post(
+        reverse('blog:add_comment', args=(post.pk,)), data={'text': 'Новый'}
+    )
+    assert revalidate(user_client, url, response).status_code == 200, (
+        'Убедитесь, что новый комментарий меняет ETag страницы поста.'
+    )
+
+
+def test_post_detail_etag_follows_csrf_token_and_session(
+    user, user_client, visible_posts
+):
+    url = reverse('blog:post_detail', args=(visible_posts[0].pk,))
+    response = user_client.get(url)
+    assert revalidate(user_client, url, response).status_code == 304
+    user_client.logout()
+    user_client.force_login(user)
+    user_client.cookies.pop('csrftoken', None)
+    user_client.get(url)
+    assert revalidate(user_client, url, response).status_code == 200, (
+        'Убедитесь, что после повторного входа страница поста с формой '
+        'комментария не отдаётся из кэша браузера со старым CSRF-токеном.'
+    )
+
+
+def test_author_rename_changes_post_detail(user_client, visible_posts):
+    post = visible_posts[0]
+    url = reverse('blog:post_detail', args=(post.pk,))
+    response = user_client.get(url)
+    assert revalidate(user_client, url, response).status_code == 304
+    post.author.username = 'renamed_author'
+    post.author.save()
+    assert revalidate(user_client, url, response).status_code == 200, (
+        'Убедитесь, что смена имени автора меняет ETag страницы поста.'
+    )
@@ -0,0 +1,93 @@
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+
+from blog import connections as blog_connections, metrics
+from blog.connections import ConnectionStats, check_connections
+
+
+class FakeConnection:
+
+    def __init__(self, alias, usable=True, opened=True):
+        self.alias = alias
+        self.connection = object() if opened else None
+        self.in_atomic_block = False
+        self.usable = usable
+
+    def is_usable(self):
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+@pytest.fixture
+def fake_connections(monkeypatch):
+    databases = [
+        FakeConnection('default'),
+        FakeConnection('dead', usable=False),
+        FakeConnection('idle', opened=False),
+    ]
+    monkeypatch.setattr(
+        blog_connections, 'connections',
+        SimpleNamespace(all=lambda: databases),
+    )
+    monkeypatch.setattr(blog_connections, 'stats', ConnectionStats())
+    return databases
+
+
+def test_health_checks_close_dead_connections(fake_connections, settings):
+    settings.BLOG_CONN_HEALTH_CHECKS = True
+    check_connections()
+    alive, dead, idle = fake_connections
+    assert dead.connection is None and alive.connection is not None, (
+        'Убедитесь, что перед запросом закрываются только неживые '
+        'соединения.'
+    )
+    assert blog_connections.stats.as_dict()['databases'] == {
+        'default': {'checks': 1, 'reused': 1},
+        'dead': {'checks': 1, 'failed_checks': 1},
+    }
+
+
+def test_health_checks_can_be_disabled(fake_connections, settings):
+    settings.BLOG_CONN_HEALTH_CHECKS = False
+    check_connections()
+    assert fake_connections[1].connection is not None
+    assert blog_connections.stats.as_dict()['databases'] == {
+        'default': {'reused': 1}, 'dead': {'reused': 1},
+    }
+
+
+def test_stats_are_reset_in_forked_worker(monkeypatch):
+    stats = ConnectionStats()
+    stats.add('default', 'opened')
+    monkeypatch.setattr(blog_connections.os, 'getpid', lambda: -1)
+    stats.add('default', 'reused')
+    assert stats.as_dict() == {
+        'pid': -1, 'databases': {'default': {'reused': 1}},
+    }, 'Убедитесь, что у каждого воркера свои счётчики соединений.'
+
+
+@pytest.mark.django_db
+def test_request_log_reports_connections(client, caplog):
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    client.get('/')
+    current = metrics.RequestMetrics()
+    token = metrics.resume(current)
+    try:
+        blog_connections.connection_opened(sender=None, connection=connection)
+    finally:
+        metrics.stop(token)
+    assert current.as_dict()['connections_opened'] == 1, (
+        'Убедитесь, что новые соединения попадают в метрики запроса.'
+    )
+    record, = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'blog.requests'
+    ]
+    assert record['connections_opened'] == 0
+    assert 'pid' in record['connections']
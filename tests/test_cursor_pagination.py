@@ -0,0 +1,91 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.paginators import pack_cursor
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category):
+    now = timezone.now()
+    # Пары постов с одинаковой датой проверяют сортировку по id.
+    dates = (now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 2 + 5))
+    posts = mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=dates,
+    )
+    return sorted(posts, key=lambda post: (post.pub_date, post.id),
+                  reverse=True)
+
+
+def walk(client, url, link_text):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([post.id for post in response.context['page_obj']])
+        match = re.search(
+            r'href="(\?cursor=[^"]+)">\s*' + re.escape(link_text),
+            response.content.decode(),
+        )
+        url = '/' + match.group(1) if match else None
+    return pages
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_pages_cover_feed_in_order(client, feed_posts):
+    pages = walk(client, '/', '>>')
+    assert [len(page) for page in pages] == [N_PER_PAGE, N_PER_PAGE, 5]
+    assert sum(pages, []) == [post.id for post in feed_posts], (
+        'Убедитесь, что курсорная пагинация выдаёт посты по порядку, '
+        'без пропусков и повторов.'
+    )
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_previous_link_returns_same_page(client, feed_posts):
+    first = client.get('/')
+    next_url = re.search(
+        r'href="(\?cursor=[^"]+)"', first.content.decode()
+    ).group(1)
+    second = client.get('/' + next_url)
+    prev_url = re.search(
+        r'href="(\?cursor=[^"]+)">\s*<<', second.content.decode()
+    ).group(1)
+    back = client.get('/' + prev_url)
+    assert (
+        [post.id for post in back.context['page_obj']]
+        == [post.id for post in first.context['page_obj']]
+    )
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+def test_cursor_pagination_skips_count(client, feed_posts):
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/')
+    assert not any(
+        'COUNT(' in query['sql'].upper() for query in queries.captured_queries
+    ), 'Курсорная пагинация не должна выполнять COUNT(*).'
+
+
+@override_settings(BLOG_CURSOR_PAGINATION=True)
+@pytest.mark.parametrize('cursor', (
+    'not-a-cursor',
+    pack_cursor(['n', [None, None]]),
+    pack_cursor(['p', ['2020-01-01T00:00:00Z', None]]),
+))
+def test_invalid_cursor_returns_404(client, feed_posts, cursor):
+    assert client.get('/', {'cursor': cursor}).status_code == 404, (
+        'Убедитесь, что испорченный курсор даёт 404, а не ошибку сервера.'
+    )
@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog import caching
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    caching.stats.reset()
+
+
+def test_anonymous_feed_served_from_cache(
+    client, post_with_published_location
+):
+    first = client.get('/')
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get('/')
+    assert second.content == first.content
+    assert len(queries) == 0, (
+        'Повторный запрос ленты анонимом должен обслуживаться из кэша.'
+    )
+    assert caching.stats.as_dict() == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.parametrize('model', ('blog.Post', 'blog.Comment',
+                                   'blog.Category', 'blog.Location'))
+def test_model_change_invalidates_feed(
+    client, mixer: Mixer, post_with_published_location, model
+):
+    client.get('/')
+    mixer.blend(model)
+    client.get('/')
+    assert caching.stats.as_dict() == {'hits': 0, 'misses': 2}
+
+
+def test_page_cached_before_commit_is_dropped(
+    client, post_with_published_location, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_published_location.save()
+        # Параллельный запрос ещё видит данные до фиксации.
+        client.get('/')
+    client.get('/')
+    assert caching.stats.as_dict() == {'hits': 0, 'misses': 2}, (
+        'Убедитесь, что кэш лент сбрасывается и после фиксации '
+        'транзакции.'
+    )
+
+
+def test_new_post_visible_after_cache(
+    client, mixer: Mixer, post_with_published_location
+):
+    client.get('/')
+    post = mixer.blend(
+        'blog.Post',
+        category=post_with_published_location.category,
+        pub_date=post_with_published_location.pub_date,
+        is_published=True,
+    )
+    assert post.title in client.get('/').content.decode()
+
+
+def test_owner_profile_bypasses_cache(user_client, user, client):
+    url = f'/profile/{user.username}/'
+    user_client.get(url)
+    user_client.get(url)
+    assert caching.stats.as_dict() == {'hits': 0, 'misses': 0}
+    client.get(url)
+    client.get(url)
+    assert caching.stats.as_dict() == {'hits': 1, 'misses': 1}
+
+
+def test_last_login_does_not_invalidate(
+    client, user, post_with_published_location
+):
+    client.get('/')
+    client.force_login(user)
+    client.logout()
+    client.get('/')
+    assert caching.stats.as_dict() == {'hits': 1, 'misses': 1}
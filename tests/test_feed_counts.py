@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog import caching
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer: Mixer, user, published_category):
+    return mixer.cycle(N_PER_PAGE * 2).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now(),
+    )
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, [
+        query['sql'] for query in queries.captured_queries
+        if 'COUNT(' in query['sql'].upper()
+    ]
+
+
+def test_feed_count_is_cached(client, feed_posts):
+    _, first = count_queries(client, '/')
+    response, second = count_queries(client, '/?page=2')
+    assert len(first) == 1
+    assert second == [], (
+        'Убедитесь, что число постов ленты берётся из кэша, '
+        'а не пересчитывается на каждой странице.'
+    )
+    assert response.context['paginator'].count == N_PER_PAGE * 2
+
+
+def test_feed_count_follows_publication(
+    client, mixer: Mixer, user, published_category, feed_posts,
+    django_capture_on_commit_callbacks,
+):
+    client.get('/')
+    client.get(f'/category/{published_category.slug}/')
+    with django_capture_on_commit_callbacks(execute=True):
+        new_post = mixer.blend(
+            'blog.Post',
+            author=user,
+            category=published_category,
+            is_published=True,
+            pub_date=timezone.now(),
+        )
+    response, counts = count_queries(client, '/?page=3')
+    assert counts == []
+    assert response.status_code == 200
+    assert list(response.context['page_obj']) == [feed_posts[0]]
+
+    new_post.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        new_post.save()
+    assert client.get('/?page=3').status_code == 404
+    response, counts = count_queries(
+        client, f'/category/{published_category.slug}/?page=2'
+    )
+    assert counts == []
+    assert response.context['paginator'].count == N_PER_PAGE * 2
+
+
+def test_rolled_back_save_keeps_count(
+    client, published_category, feed_posts,
+    django_capture_on_commit_callbacks,
+):
+    client.get('/')
+    post = feed_posts[0]
+    post.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                post.save()
+                raise RuntimeError
+    response, counts = count_queries(client, '/')
+    assert counts == []
+    assert response.context['paginator'].count == N_PER_PAGE * 2, (
+        'Убедитесь, что откаченное сохранение не меняет число постов '
+        'в кэше.'
+    )
+
+
+def test_category_change_resets_counts(
+    client, published_category, feed_posts
+):
+    client.get('/')
+    published_category.is_published = False
+    published_category.save()
+    response, counts = count_queries(client, '/')
+    assert len(counts) == 1
+    assert response.context['paginator'].count == 0
+
+
+def test_owner_profile_counts_exactly(user_client, user, feed_posts):
+    caching.count_stats.reset()
+    user_client.get(f'/profile/{user.username}/')
+    assert caching.count_stats.as_dict() == {'hits': 0, 'misses': 0}
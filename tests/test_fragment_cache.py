@@ -0,0 +1,77 @@
+import json
+import logging
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from blog.caching import card_key
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def card_fragments(caplog, client):
+    caplog.clear()
+    caches['feeds'].clear()
+    client.get('/')
+    record, = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == 'blog.requests'
+    ]
+    return record['fragments']['post_card']
+
+
+def test_feed_reuses_cached_cards(client, many_posts_with_published_locations,
+                                  caplog):
+    Post.objects.update(
+        is_published=True, pub_date=timezone.now() - timedelta(days=1)
+    )
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    first = card_fragments(caplog, client)
+    assert (first['hits'], first['misses']) == (0, 10)
+    second = card_fragments(caplog, client)
+    assert (second['hits'], second['misses']) == (10, 0), (
+        'Убедитесь, что карточки постов берутся из кэша фрагментов.'
+    )
+    post = Post.objects.published().order_by('-pub_date').first()
+    Post.objects.filter(pk=post.pk).update(comment_count=100)
+    third = card_fragments(caplog, client)
+    assert (third['hits'], third['misses']) == (9, 1), (
+        'Убедитесь, что карточка перерисовывается после смены числа '
+        'комментариев.'
+    )
+
+
+def test_card_key_follows_rendered_fields(post_with_published_location):
+    post = post_with_published_location
+    key = card_key(post)
+    assert card_key(Post.objects.get(pk=post.pk)) == key
+    changes = (
+        (post.category, 'is_published', False),
+        (post.location, 'is_published', False),
+        (post.author, 'username', 'renamed'),
+        (post, 'comment_count', post.comment_count + 1),
+        (post, 'title', 'Новый заголовок'),
+    )
+    for instance, field, value in changes:
+        old = getattr(instance, field)
+        setattr(instance, field, value)
+        assert card_key(post) != key, (
+            f'Убедитесь, что ключ карточки зависит от {field}.'
+        )
+        setattr(instance, field, old)
+    assert card_key(post) == key
+
+
+def test_cached_card_matches_include(client, post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        is_published=True, pub_date=timezone.now() - timedelta(days=1)
+    )
+    post.refresh_from_db()
+    card = render_to_string('includes/post_card.html', {'post': post})
+    client.get('/')
+    assert caches['fragments'].get(card_key(post)) == card
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+ARGS = (
+    '--users', '20', '--categories', '10', '--locations', '5',
+    '--posts', '200', '--comments', '1000', '--batch-size', '64',
+    '--seed', '7',
+)
+
+
+def generate(workers):
+    call_command(
+        'generate_blog_data', *ARGS, '--workers', str(workers),
+        stdout=StringIO(),
+    )
+    return {
+        'users': list(User.objects.values_list('username', 'password')),
+        'posts': list(Post.objects.order_by('pk').values_list(
+            'title', 'is_published', 'comment_count', 'author__username',
+        )),
+        'comments': list(Comment.objects.order_by('pk').values_list(
+            'post__title', 'author__username', 'text',
+        )),
+    }
+
+
+def test_generated_data_shape():
+    data = generate(workers=0)
+    assert len(data['users']) == 20
+    assert Category.objects.count() == 10 and Location.objects.count() == 5
+    assert Comment.objects.count() == 1000
+    assert len({password for _, password in data['users']}) == 1, (
+        'Убедитесь, что пароль хешируется один раз для всех пользователей.'
+    )
+    assert User.objects.first().check_password('blogicum')
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists()
+    assert Post.objects.filter(is_published=False).exists()
+    counts = sorted(
+        (count for *_, count, _ in data['posts']), reverse=True
+    )
+    assert sum(counts) == 1000
+    assert sum(counts[:40]) > 500, (
+        'Убедитесь, что комментарии распределены с длинным хвостом.'
+    )
+    now = timezone.now()
+    for model in (Post, Comment):
+        oldest, newest = model.objects.aggregate(
+            Min('created_at'), Max('created_at')
+        ).values()
+        assert newest <= now and now - oldest > timedelta(days=30), (
+            'Убедитесь, что created_at сгенерированных записей разнесены '
+            'по времени, а не равны моменту запуска.'
+        )
+    assert not Comment.objects.filter(
+        post__pub_date__lte=now, created_at__lt=F('post__pub_date')
+    ).exists(), 'Убедитесь, что комментарии не старше своих постов.'
+
+
+def test_generated_data_is_reproducible_across_workers():
+    serial = generate(workers=0)
+    for model in (Comment, Post, Location, Category, User):
+        model.objects.all().delete()
+    assert generate(workers=2) == serial, (
+        'Убедитесь, что при одном seed данные не зависят от числа процессов.'
+    )
@@ -0,0 +1,74 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+
+from blog.views import CategoryPostsListView, PostListView, ProfileListView
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN is SQLite'
+    ),
+]
+
+
+def get_view_queryset(view_class, user=None, **kwargs):
+    request = RequestFactory().get('/')
+    request.user = user or AnonymousUser()
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_uses_index(queryset, table, index):
+    plan = query_plan(queryset)
+    table_steps = [step for step in plan if f' {table}' in step]
+    assert any(index in step for step in table_steps), (
+        f'Убедитесь, что запрос к `{table}` использует индекс `{index}`. '
+        f'План запроса: {plan}'
+    )
+    assert not any(
+        step.startswith(f'SCAN {table}') and 'INDEX' not in step
+        for step in plan
+    ), f'Запрос не должен полностью сканировать `{table}`: {plan}'
+    assert not any('TEMP B-TREE' in step for step in plan), (
+        f'Сортировка должна браться из индекса `{index}`: {plan}'
+    )
+
+
+def test_index_feed_uses_index():
+    assert_uses_index(
+        get_view_queryset(PostListView)[:10], 'blog_post', 'post_feed_idx'
+    )
+
+
+def test_category_feed_uses_index(published_category):
+    queryset = get_view_queryset(
+        CategoryPostsListView, category_slug=published_category.slug
+    )
+    assert_uses_index(
+        queryset[:10], 'blog_post', 'post_category_feed_idx'
+    )
+
+
+@pytest.mark.parametrize('as_owner', (False, True))
+def test_profile_feed_uses_index(user, as_owner):
+    queryset = get_view_queryset(
+        ProfileListView,
+        user=user if as_owner else None,
+        username=user.username,
+    )
+    assert_uses_index(queryset[:10], 'blog_post', 'post_author_feed_idx')
+
+
+def test_post_comments_use_index(post_with_published_location):
+    queryset = post_with_published_location.comments.select_related('author')
+    assert_uses_index(queryset, 'blog_comment', 'comment_post_created_idx')
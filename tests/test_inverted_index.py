@@ -0,0 +1,128 @@
+from array import array
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.inverted_index import (InvertedIndex, decode, encode,
+                                 search_index)
+from blog.models import Post
+from blog.stemmer import stem
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('words', [
+    ('розами', 'розы', 'розой'),
+    ('красивая', 'красивого', 'красивейший'),
+    ('книгами', 'книгу', 'книге'),
+    ('читала', 'читать', 'читает'),
+    ('ёлки', 'елка', 'ёлкой'),
+])
+def test_stem_merges_inflected_forms(words):
+    assert len({stem(word) for word in words}) == 1, (
+        'Убедитесь, что стеммер приводит формы слова к одной основе.'
+    )
+
+
+def test_postings_are_delta_encoded():
+    deltas = encode([3, 10, 11, 400])
+    assert isinstance(deltas, array) and deltas.typecode == 'I'
+    assert list(deltas) == [3, 7, 1, 389]
+    assert decode(deltas) == [3, 10, 11, 400]
+
+
+@pytest.fixture
+def indexed(mixer: Mixer, django_capture_on_commit_callbacks):
+    def blend(model, **kwargs):
+        with django_capture_on_commit_callbacks(execute=True):
+            return mixer.blend(model, **kwargs)
+    return blend
+
+
+def test_search_intersects_terms(indexed):
+    garden = indexed('blog.Post', title='Сад', text='Красные розы')
+    indexed('blog.Post', title='Букет', text='Белые розы')
+    search_index.rebuild()
+    assert len(search_index.search('розами')) == 2
+    assert search_index.search('красными розами') == [garden.id]
+    assert search_index.search('красными тюльпанами') == []
+
+
+def test_signals_update_loaded_index(indexed, django_capture_on_commit_callbacks):
+    post = indexed('blog.Post', title='Прогулка', text='По лесу')
+    search_index.ensure_loaded()
+    comment = indexed('blog.Comment', post=post, text='Видели лисицу')
+    assert search_index.search('лисицы') == [post.id], (
+        'Убедитесь, что индекс учитывает текст новых комментариев.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.delete()
+    assert search_index.search('лисицы') == []
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Пробежка'
+        post.save()
+    assert search_index.search('прогулки') == []
+    assert search_index.search('пробежки') == [post.id]
+
+
+def test_snapshot_is_memory_mapped(indexed, django_capture_on_commit_callbacks):
+    first = indexed('blog.Post', title='Горы', text='Снег и ветер')
+    call_command('build_search_index', stdout=StringIO())
+    search_index.reset()
+    assert search_index.load()
+    assert isinstance(search_index._postings['снег'], memoryview)
+    assert search_index.search('снега') == [first.id]
+    second = indexed('blog.Post', title='Снег в городе')
+    assert search_index.search('снегом') == [first.id, second.id]
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert search_index.search('снег') == [second.id]
+
+
+def test_changes_before_load_are_applied(
+    indexed, django_capture_on_commit_callbacks
+):
+    post = indexed('blog.Post', title='Река')
+    search_index.save()
+    search_index.reset()
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Озеро'
+        post.save()
+    assert search_index.search('озера') == [post.id]
+    assert search_index.search('реки') == []
+
+
+def test_index_catches_up_with_other_processes(indexed, settings):
+    settings.BLOG_SEARCH_INDEX_REFRESH_SECONDS = 0
+    post = indexed('blog.Post', title='Поле')
+    search_index.save()
+    search_index.reset()
+    assert search_index.search('поля') == [post.id]
+    # UPDATE без сигналов — так выглядит запись из другого процесса.
+    Post.objects.filter(pk=post.pk).update(
+        title='Луг', updated_at=timezone.now()
+    )
+    assert search_index.search('луга') == [post.id], (
+        'Убедитесь, что индекс догоняет посты, изменённые другими '
+        'процессами.'
+    )
+
+
+def test_index_reloads_changed_snapshot(indexed, settings):
+    settings.BLOG_SEARCH_INDEX_REFRESH_SECONDS = 0
+    post = indexed('blog.Post', title='Берег')
+    search_index.ensure_loaded()
+    Post.objects.filter(pk=post.pk).update(
+        title='Озеро', updated_at=timezone.now() - timedelta(days=1)
+    )
+    other = InvertedIndex()
+    other.rebuild()
+    other.save()
+    assert search_index.search('озера') == [post.id], (
+        'Убедитесь, что индекс перечитывает снимок, сохранённый '
+        'другим процессом.'
+    )
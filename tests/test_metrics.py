@@ -0,0 +1,97 @@
+import json
+import logging
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.metrics import RequestMetrics
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def records(caplog):
+    return [
+        (record.levelno, json.loads(record.getMessage()))
+        for record in caplog.records if record.name == 'blog.requests'
+    ]
+
+
+def timing(response):
+    return dict(
+        part.strip().split(';', 1)
+        for part in response['Server-Timing'].split(',')
+    )
+
+
+def test_server_timing_and_log_line(user_client, post_with_published_location,
+                                    caplog):
+    url = f'/posts/{post_with_published_location.id}/'
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(url)
+    parts = timing(response)
+    assert set(parts) == {'db', 'tpl', 'view', 'cache', 'total'}
+    assert f'desc="{len(queries)} queries"' in parts['db'], (
+        'Убедитесь, что Server-Timing показывает число SQL-запросов.'
+    )
+    (level, record), = records(caplog)
+    assert record['view'] == 'blog:post_detail'
+    assert record['queries'] == len(queries)
+    assert record['template_ms'] > 0
+    assert level == logging.INFO and record['flags'] == []
+
+
+def test_cache_hits_are_counted(client, caplog):
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    client.get('/')
+    client.get('/')
+    (_, first), (_, second) = records(caplog)
+    assert first['cache_misses'] >= 1 and first['cache_hits'] == 0
+    assert second['cache_hits'] == 1 and second['queries'] < first['queries']
+
+
+def test_thresholds_flag_requests_by_url_name(client, settings, caplog):
+    settings.BLOG_REQUEST_THRESHOLDS = {
+        'default': {'total_ms': 10 ** 6, 'queries': 100, 'duplicates': 100},
+        'blog:index': {'queries': 0},
+    }
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    client.get('/')
+    (level, record), = records(caplog)
+    assert level == logging.WARNING
+    assert record['flags'] == ['many_queries']
+
+
+def test_duplicates_detect_repeated_statements(mixer: Mixer):
+    posts = mixer.cycle(3).blend('blog.Post')
+    metrics = RequestMetrics()
+    with connection.execute_wrapper(metrics):
+        for post in Post.objects.filter(pk__in=[p.pk for p in posts]):
+            post.author.username
+    assert metrics.queries == 4
+    assert metrics.duplicates == 3, (
+        'Убедитесь, что повторы одного запроса считаются как признак N+1.'
+    )
+
+
+def test_streaming_response_is_measured_until_closed(
+    admin_client, mixer: Mixer, caplog
+):
+    mixer.cycle(3).blend('blog.Post')
+    caplog.set_level(logging.INFO, logger='blog.requests')
+    response = admin_client.get('/export/posts/')
+    assert not response.has_header('Server-Timing')
+    assert not records(caplog), (
+        'Убедитесь, что итог потокового ответа не пишется до его отдачи.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        b''.join(response.streaming_content)
+    response.close()
+    (_, record), = records(caplog)
+    assert record['view'] == 'blog:export'
+    assert record['queries'] >= len(queries) >= 1, (
+        'Убедитесь, что запросы при чтении потока попадают в метрики.'
+    )
@@ -0,0 +1,32 @@
+import pytest
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+
+
+def render_paginator(num_pages, number):
+    page = Paginator(range(num_pages * 10), 10).page(number)
+    return render_to_string('includes/paginator.html', {
+        'page_obj': page,
+        'page_range': page.paginator.get_elided_page_range(
+            number, on_each_side=2, on_ends=1
+        ),
+    })
+
+
+@pytest.mark.parametrize('number', (1, 2, 500, 4999, 5000))
+def test_paginator_renders_elided_range(number):
+    html = render_paginator(5000, number)
+    assert html.count('<li') <= 13, (
+        'Убедитесь, что пагинатор выводит сокращённый диапазон страниц, '
+        'а не ссылку на каждую страницу.'
+    )
+    assert f'?page={number}"' not in html
+    assert '?page=5000"' in html or number == 5000
+
+
+def test_paginator_size_does_not_grow_with_pages():
+    sizes = {
+        len(render_paginator(num_pages, num_pages // 2).split())
+        for num_pages in (100, 10_000, 1_000_000)
+    }
+    assert len(sizes) == 1
@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.conf import settings
+from django.core.cache.backends import base, locmem
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.scheduler import schedule
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    '''Переводит часы Django и сроки кэша вперёд без ожидания.'''
+    offset = timedelta()
+    now, wall_time = timezone.now, time.time
+
+    def advance(delta):
+        nonlocal offset
+        offset += delta
+
+    monkeypatch.setattr(timezone, 'now', lambda: now() + offset)
+    shifted = SimpleNamespace(
+        time=lambda: wall_time() + offset.total_seconds()
+    )
+    for module in (base, locmem):
+        monkeypatch.setattr(module, 'time', shifted)
+    return advance
+
+
+@pytest.fixture
+def scheduled_post(mixer: Mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(hours=1),
+    )
+
+
+def test_timeout_capped_by_next_publication(
+    scheduled_post, another_category
+):
+    assert schedule.next_due('index') == scheduled_post.pub_date
+    assert 3590 <= schedule.timeout('index', default=86400) <= 3600
+    assert schedule.timeout(
+        f'category:{scheduled_post.category.slug}', default=86400
+    ) <= 3600
+    assert schedule.timeout(
+        f'author:{scheduled_post.author.username}', default=86400
+    ) <= 3600
+    assert schedule.timeout(
+        f'category:{another_category.slug}'
+    ) == settings.BLOG_FEED_CACHE_TIMEOUT, (
+        'Отложенный пост не должен сокращать кэш других лент.'
+    )
+
+
+def test_scheduled_post_appears_on_time(
+    client, clock, mixer: Mixer, user, published_category
+):
+    post = mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=60),
+    )
+    assert post.title not in client.get('/').content.decode()
+    clock(timedelta(seconds=30))
+    assert post.title not in client.get('/').content.decode()
+    clock(timedelta(seconds=31))
+    assert post.title in client.get('/').content.decode(), (
+        'Убедитесь, что отложенный пост появляется в закэшированной ленте '
+        'в момент публикации.'
+    )
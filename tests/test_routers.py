@@ -0,0 +1,134 @@
+import time
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.urls import reverse
+
+from blog import caching
+from blog.middleware import ReplicaMiddleware
+from blog.models import Post, User
+from blog.routers import (PIN_COOKIE, ReplicaRouter, routing, track_writes,
+                          use_replica)
+from blog.views import PostCreateView, PostListView
+
+router = ReplicaRouter()
+
+
+def run(sql):
+    '''Пропускает запрос через обёртку записи, не выполняя его.'''
+    return track_writes(lambda *args: None, sql, None, False, {})
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.BLOG_READ_REPLICAS = ['replica1']
+    return settings
+
+
+def test_reads_go_to_replica_until_first_write(replicas):
+    assert router.db_for_read(Post) is None
+    with routing():
+        assert router.db_for_read(Post) is None, (
+            'Убедитесь, что без разрешения запрос читает с основной базы.'
+        )
+        use_replica()
+        assert router.db_for_read(Post) == 'replica1'
+        assert router.db_for_read(User) == 'default', (
+            'Убедитесь, что пользователи читаются с основной базы.'
+        )
+        assert router.db_for_read(Session) == 'default', (
+            'Убедитесь, что сессии читаются с основной базы.'
+        )
+        assert router.db_for_write(Post) == 'default'
+        run('SELECT 1')
+        assert router.db_for_read(Post) == 'replica1', (
+            'Убедитесь, что выбор базы и чтение не считаются записью.'
+        )
+        run('\n UPDATE "blog_post" SET "comment_count" = 1')
+        assert router.db_for_read(Post) is None, (
+            'Убедитесь, что после записи запрос читает с основной базы.'
+        )
+    assert router.allow_migrate('replica1', 'blog') is False
+
+
+def handle(method, view, cookies=None):
+    '''Прогоняет запрос через ReplicaMiddleware и возвращает базу чтения.'''
+    request = getattr(RequestFactory(), method)('/')
+    request.COOKIES.update(cookies or {})
+    routes = []
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        routes.append(router.db_for_read(Post))
+        if method == 'post':
+            run('INSERT INTO "blog_post" DEFAULT VALUES')
+        return HttpResponse()
+
+    middleware = ReplicaMiddleware(get_response)
+    response = middleware(request)
+    return routes[0], response
+
+
+def test_middleware_routes_and_pins(replicas):
+    feed = PostListView.as_view()
+    assert handle('get', feed)[0] == 'replica1', (
+        'Убедитесь, что ленты читаются с реплики.'
+    )
+    assert handle('get', PostCreateView.as_view())[0] is None
+    assert handle('get', feed, {PIN_COOKIE: '1'})[0] is None, (
+        'Убедитесь, что пользователь после записи читает с основной базы.'
+    )
+    _, response = handle('post', feed)
+    cookie = response.cookies[PIN_COOKIE]
+    assert cookie['max-age'] == replicas.BLOG_REPLICA_PIN_SECONDS
+    assert PIN_COOKIE not in handle('get', feed)[1].cookies
+
+
+@pytest.mark.django_db
+def test_comment_pins_author_to_primary(user_client,
+                                        post_with_published_location):
+    post = post_with_published_location
+    user_client.get('/')
+    assert PIN_COOKIE not in user_client.cookies
+    user_client.post(
+        reverse('blog:add_comment', args=(post.id,)),
+        data={'text': 'Комментарий'},
+    )
+    assert PIN_COOKIE in user_client.cookies, (
+        'Убедитесь, что после комментария пользователь закреплён '
+        'за основной базой.'
+    )
+
+
+@pytest.mark.django_db
+def test_feed_cache_miss_reads_from_replica_after_pin(
+    replicas, monkeypatch, client, post_with_published_location
+):
+    routes = []
+    choose = ReplicaRouter.db_for_read
+
+    def spy(self, model, **hints):
+        # Реплики в тестах нет: запоминаем выбор, читаем из default.
+        routes.append(choose(self, model, **hints))
+        return None
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', spy)
+    assert client.get('/').status_code == 200
+    assert routes and 'replica1' not in routes, (
+        'Убедитесь, что сразу после сброса кэша лент его промахи '
+        'читаются с основной базы.'
+    )
+    caching.invalidate_feeds()
+    caches['feeds'].set(
+        caching.INVALIDATED_KEY,
+        time.time() - replicas.BLOG_REPLICA_PIN_SECONDS, None,
+    )
+    routes.clear()
+    assert client.get('/').status_code == 200
+    assert 'replica1' in routes and None not in routes, (
+        'Убедитесь, что промахи кэша лент читаются с реплики, когда она '
+        'успела догнать последний сброс.'
+    )
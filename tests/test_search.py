@@ -0,0 +1,169 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.inverted_index import search_index
+from blog.search import FTS_TABLE, fts_available, install_fts
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable(mixer: Mixer, user, published_category):
+    def blend(title, text='', **kwargs):
+        kwargs.setdefault('author', user)
+        kwargs.setdefault('is_published', True)
+        kwargs.setdefault('pub_date', timezone.now() - timedelta(days=1))
+        return mixer.blend(
+            'blog.Post', title=title, text=text, category=published_category, **kwargs,
+        )
+    return blend
+
+
+def found(client, query, url='/search/'):
+    response = client.get(url, {'q': query})
+    assert response.status_code == 200
+    return [post.id for post in response.context['page_obj']]
+
+
+def test_search_ranks_title_matches_first(client, searchable):
+    in_text = searchable('Заметки', 'Про тюльпаны и розы')
+    in_title = searchable('Тюльпаны весной', 'Сад')
+    searchable('Другое', 'Совсем другое')
+    assert found(client, 'тюльпаны') == [in_title.id, in_text.id], (
+        'Убедитесь, что поиск находит посты по словам и ставит выше '
+        'совпадения в заголовке.'
+    )
+
+
+def test_search_matches_prefixes_and_all_words(client, searchable):
+    both = searchable('Горный поход', 'Палатка и костёр')
+    searchable('Горный велосипед', 'Шоссе')
+    assert found(client, 'гор палат') == [both.id]
+
+
+def test_search_respects_visibility(client, searchable, another_user):
+    visible = searchable('Комета')
+    searchable('Комета', is_published=False)
+    searchable('Комета', pub_date=timezone.now() + timedelta(days=1))
+    searchable('Комета', author=another_user, is_published=False)
+    assert found(client, 'комета') == [visible.id], (
+        'Убедитесь, что поиск не показывает неопубликованные и '
+        'отложенные посты.'
+    )
+
+
+def test_search_hides_own_drafts(user_client, searchable):
+    visible = searchable('Комета')
+    searchable('Комета', is_published=False)
+    searchable('Комета', pub_date=timezone.now() + timedelta(days=1))
+    assert found(user_client, 'комета') == [visible.id], (
+        'Убедитесь, что автор не находит поиском свои черновики и '
+        'отложенные посты.'
+    )
+
+
+def test_fts_available_is_memoized(searchable, django_assert_num_queries):
+    fts_available()
+    with django_assert_num_queries(0):
+        assert fts_available(), (
+            'Убедитесь, что наличие FTS5 не проверяется на каждый поиск.'
+        )
+
+
+def test_search_index_follows_edits_and_deletes(client, searchable):
+    post = searchable('Старый заголовок')
+    post.title = 'Новый заголовок'
+    post.save()
+    assert found(client, 'старый') == []
+    assert found(client, 'новый') == [post.id]
+    post.delete()
+    assert found(client, 'новый') == []
+
+
+def test_search_cursor_pages(client, searchable):
+    posts = [searchable(f'Луна {i}') for i in range(13)]
+    response = client.get('/search/', {'q': 'луна'})
+    first = [post.id for post in response.context['page_obj']]
+    next_url = re.search(
+        r'href="(\?[^"]*cursor=[^"]+)"', response.content.decode()
+    ).group(1).replace('&amp;', '&')
+    assert 'q=' in next_url, (
+        'Убедитесь, что ссылки пагинации сохраняют поисковый запрос.'
+    )
+    second = client.get('/search/' + next_url)
+    rest = [post.id for post in second.context['page_obj']]
+    assert sorted(first + rest) == sorted(post.id for post in posts)
+
+
+def test_search_rejects_bad_cursor(client, searchable):
+    searchable('Луна')
+    response = client.get('/search/', {'q': 'луна', 'cursor': 'мусор'})
+    assert response.status_code == 404
+
+
+def test_search_empty_query(client, searchable):
+    searchable('Луна')
+    assert found(client, '') == []
+    assert found(client, '"*') == []
+
+
+@pytest.mark.parametrize('fallback, expected', [('index', 1), ('like', 0)])
+def test_search_fallback_without_fts(
+    client, searchable, monkeypatch, settings, fallback, expected
+):
+    monkeypatch.setattr('blog.search.fts_available', lambda using: False)
+    settings.BLOG_SEARCH_FALLBACK = fallback
+    searchable('Красивые розы')
+    assert len(found(client, 'розами')) == expected, (
+        'Убедитесь, что без FTS5 поиск идёт по индексу со стеммингом.'
+    )
+
+
+def test_index_fallback_keeps_all_matches(
+    client, searchable, monkeypatch, settings
+):
+    monkeypatch.setattr('blog.search.fts_available', lambda using: False)
+    settings.BLOG_SEARCH_FALLBACK = 'index'
+    old = searchable('Розы', pub_date=timezone.now() - timedelta(days=30))
+    for _ in range(3):
+        searchable('Розы', is_published=False)
+    assert found(client, 'розы') == [old.id], (
+        'Убедитесь, что новые черновики не вытесняют из поиска старые '
+        'опубликованные посты.'
+    )
+    search = search_index.search
+    monkeypatch.setattr(
+        search_index, 'search',
+        lambda text: search(text) + list(range(10 ** 6, 10 ** 6 + 40000)),
+    )
+    assert found(client, 'розы') == [old.id], (
+        'Убедитесь, что поиск не ограничен числом параметров запроса.'
+    )
+
+
+def test_install_fts_restores_triggers(searchable):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER {FTS_TABLE}_ai')
+    post = searchable('Потерянный')
+    assert install_fts(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            ['потерянный'],
+        )
+        assert cursor.fetchall() == [(post.id,)]
+
+
+def test_admin_search_uses_index(admin_client, searchable):
+    post = searchable('Заметки', 'Про тюльпаны')
+    searchable('Другое')
+    response = admin_client.get('/admin/blog/post/', {'q': 'тюльпаны'})
+    assert response.status_code == 200
+    assert [
+        obj.id for obj in response.context['cl'].result_list
+    ] == [post.id]
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from blog.backends.sqlite3.base import PRAGMAS, _writes, pragmas
+from blog.middleware import TransactionModeMiddleware
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_connection_gets_pragma_profile():
+    assert pragma('synchronous') == 1, (
+        'Убедитесь, что соединение открывается с synchronous=NORMAL.'
+    )
+    assert pragma('temp_store') == 2, (
+        'Убедитесь, что временные таблицы хранятся в памяти.'
+    )
+    assert pragma('busy_timeout') == PRAGMAS['busy_timeout']
+    assert pragma('cache_size') == PRAGMAS['cache_size']
+
+
+def test_pragmas_are_overridden_from_options():
+    profile = pragmas({'pragmas': {'mmap_size': None, 'cache_size': -1000}})
+    assert 'mmap_size' not in profile, (
+        'Убедитесь, что значение None отключает PRAGMA профиля.'
+    )
+    assert profile['cache_size'] == -1000
+    assert list(profile)[0] == 'busy_timeout'
+    assert 'pragmas' not in connection.get_connection_params(), (
+        'Убедитесь, что OPTIONS["pragmas"] не передаётся в sqlite3.connect.'
+    )
+
+
+def begin_statements():
+    with CaptureQueriesContext(connection) as queries:
+        with transaction.atomic():
+            pass
+    return [
+        query['sql'] for query in queries if query['sql'].startswith('BEGIN')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transaction_mode_depends_on_method():
+    assert begin_statements() == ['BEGIN IMMEDIATE'], (
+        'Убедитесь, что транзакции на запись начинаются с BEGIN IMMEDIATE.'
+    )
+    factory = RequestFactory()
+    statements = {}
+    for method in ('get', 'post'):
+        middleware = TransactionModeMiddleware(
+            lambda request: statements.setdefault(
+                request.method, begin_statements()
+            )
+        )
+        middleware(getattr(factory, method)('/'))
+    assert statements == {'GET': ['BEGIN'], 'POST': ['BEGIN IMMEDIATE']}, (
+        'Убедитесь, что транзакции GET-запросов начинаются с BEGIN, '
+        'а POST-запросов — с BEGIN IMMEDIATE.'
+    )
+    assert _writes.get()
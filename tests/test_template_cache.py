@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+from django.template import Engine
+
+from blog.template_cache import compile_templates
+
+
+@pytest.fixture
+def engine(tmp_path):
+    (tmp_path / 'includes').mkdir()
+    (tmp_path / 'includes' / 'card.html').write_text('{{ post.title }}')
+    (tmp_path / 'feed.html').write_text(
+        '{% for post in posts %}{% include "includes/card.html" %}'
+        '{% endfor %}'
+    )
+    return Engine(
+        dirs=[str(tmp_path)],
+        loaders=[(
+            'django.template.loaders.cached.Loader',
+            ['django.template.loaders.filesystem.Loader'],
+        )],
+    )
+
+
+def test_compile_templates_warms_cached_loader(engine):
+    assert compile_templates(engine) == (2, {})
+    cached = engine.template_loaders[0].get_template_cache
+    assert set(cached) == {'feed.html', 'includes/card.html'}, (
+        'Убедитесь, что compile_templates заполняет кэш загрузчика.'
+    )
+
+
+def test_compile_templates_reports_errors(engine, tmp_path):
+    (tmp_path / 'broken.html').write_text('{% if %}')
+    (tmp_path / 'orphan.html').write_text('{% include "includes/no.html" %}')
+    count, errors = compile_templates(engine)
+    assert count == 4
+    assert set(errors) == {'broken.html', 'orphan.html'}, (
+        'Убедитесь, что находятся и синтаксические ошибки, '
+        'и ссылки на несуществующие шаблоны.'
+    )
+    assert 'includes/no.html' in errors['orphan.html']
+
+
+def test_project_templates_compile(capsys):
+    call_command('compile_templates')
+    assert capsys.readouterr().out.startswith('Шаблонов: ')
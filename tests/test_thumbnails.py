@@ -0,0 +1,144 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+
+from blog.forms import PostForm
+from blog.image_jobs import image_queue
+from blog.models import ImageJob, Post
+from blog.thumbnails import THUMBNAIL_SIZES, thumbnail_name, thumbnail_url
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_png(width=2000, height=1500):
+    buffer = BytesIO()
+    Image.new('RGBA', (width, height), (200, 30, 30, 255)).save(
+        buffer, 'PNG'
+    )
+    return SimpleUploadedFile('photo.png', buffer.getvalue(), 'image/png')
+
+
+def create_post_with_image(user_client, category, image):
+    response = user_client.post('/posts/create/', {
+        'title': 'Пост с фото',
+        'text': 'Текст',
+        'pub_date': timezone.localtime().strftime('%Y-%m-%d %H:%M'),
+        'category': category.id,
+        'is_published': True,
+        'image': image,
+    })
+    assert response.status_code == 302
+    return Post.objects.get(title='Пост с фото')
+
+
+def test_post_shows_original_until_job_done(
+    user_client, published_category, media_root
+):
+    post = create_post_with_image(user_client, published_category, make_png())
+    job = ImageJob.objects.get(post=post)
+    assert job.status == ImageJob.PENDING, (
+        'Убедитесь, что изображение обрабатывается вне запроса.'
+    )
+    content = user_client.get('/').content.decode()
+    assert f'src="{post.image.url}"' in content
+
+
+def test_thumbnails_created_after_commit(
+    user_client, published_category, media_root, settings,
+    django_capture_on_commit_callbacks,
+):
+    settings.BLOG_IMAGE_WORKERS = 0
+    with django_capture_on_commit_callbacks(execute=True):
+        post = create_post_with_image(
+            user_client, published_category, make_png()
+        )
+    assert ImageJob.objects.get(post=post).status == ImageJob.DONE
+    for size, (width, height, crop) in THUMBNAIL_SIZES.items():
+        path = media_root / thumbnail_name(post.image.name, size)
+        assert path.exists(), f'Не создана миниатюра `{size}`.'
+        with Image.open(path) as thumbnail:
+            assert thumbnail.width <= width and thumbnail.height <= height
+            if crop:
+                assert thumbnail.size == (width, height)
+
+    content = user_client.get('/').content.decode()
+    assert thumbnail_name(post.image.name, 'card') in content, (
+        'Убедитесь, что в карточке поста выводится миниатюра изображения.'
+    )
+    post.refresh_from_db()
+    assert thumbnail_name(post.image.name, 'admin') in post.image_tag()
+
+
+def test_generate_thumbnails_command(mixer, media_root):
+    post = mixer.blend('blog.Post', image=make_png(300, 200))
+    name = thumbnail_name(post.image.name, 'detail')
+    assert not (media_root / name).exists()
+    assert post.image.url in post.image_tag()
+    call_command('generate_thumbnails', stdout=StringIO())
+    assert (media_root / name).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_process_pool_handles_queued_jobs(mixer, media_root, settings):
+    settings.BLOG_IMAGE_WORKERS = 1
+    image = Image.new('RGB', (800, 600), (0, 0, 255))
+    exif = image.getexif()
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post',
+        image=SimpleUploadedFile('rotated.jpg', buffer.getvalue()),
+    )
+    ImageJob.objects.create(post=post, image=post.image.name)
+    image_queue.drain()
+    assert ImageJob.objects.get(post=post).status == ImageJob.DONE
+    with Image.open(
+        media_root / thumbnail_name(post.image.name, 'detail')
+    ) as thumbnail:
+        assert thumbnail.size == (600, 800), (
+            'Убедитесь, что миниатюра повёрнута по EXIF.'
+        )
+
+
+def test_thumbnail_url_uses_recorded_format(mixer, settings, monkeypatch):
+    post = mixer.blend(
+        'blog.Post', image=make_png(300, 200), thumbnail_format='JPEG'
+    )
+    settings.BLOG_THUMBNAIL_FORMAT = 'WEBP'
+    storage = type(post.image.storage)
+
+    def exists(self, name):
+        raise AssertionError('Убедитесь, что URL миниатюры не опрашивает '
+                             'хранилище.')
+
+    monkeypatch.setattr(storage, 'exists', exists, raising=False)
+    assert thumbnail_url(post.image, 'card').endswith(
+        thumbnail_name(post.image.name, 'card', 'JPEG')
+    ), 'Убедитесь, что смена формата не теряет готовые миниатюры.'
+    form = PostForm(
+        {
+            'title': post.title, 'text': post.text,
+            'pub_date': post.pub_date, 'category': post.category_id,
+        },
+        {'image': make_png(100, 100)},
+        instance=post,
+    )
+    assert form.is_valid(), form.errors
+    monkeypatch.undo()
+    form.save()
+    post.refresh_from_db()
+    assert post.thumbnail_format == '', (
+        'Убедитесь, что новое изображение показывается оригиналом, '
+        'пока его миниатюры не готовы.'
+    )